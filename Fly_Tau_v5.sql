@@ -29,7 +29,10 @@ CREATE TABLE Aircrafts (
 	Manufacturer    ENUM('Boeing','Airbus','Dasso') NOT NULL,
     Model    VARCHAR(40) NOT NULL,
     Size            ENUM('Small','Large') NOT NULL,
-    Purchase_Date   DATETIME NOT NULL
+    Purchase_Date   DATETIME NOT NULL,
+    -- Denormalized: maintained by the app when seats are (re)generated,
+    -- so the fleet list does not GROUP BY the whole Seats table.
+    Seat_Count      INT NOT NULL DEFAULT 0
 );
 
 CREATE TABLE Seats (
@@ -189,10 +192,43 @@ CREATE TABLE FlightCrew_Attendants (
         FOREIGN KEY (Flight_id) REFERENCES Flights(Flight_id)
 );
 
+-- Shared running-number sequences for prefixed display ids (S001, ACB001, ...).
+-- Replacing this with AUTO_INCREMENT surrogate keys plus a generated display-id
+-- column was considered, but MySQL does not allow a GENERATED column to refer
+-- to an AUTO_INCREMENT column, so the app keeps this table and bumps it with a
+-- single atomic UPDATE ... LAST_INSERT_ID(NextNum) statement instead.
 CREATE TABLE  IdCounters (
   Name    VARCHAR(50) NOT NULL PRIMARY KEY,
   NextNum BIGINT NOT NULL
-); 
+);
+
+
+-- NOTE: no lowercased-email generated columns — emails are lowercased
+-- at every write path, so plain Customer_Email = %s lookups are already
+-- index seeks on the existing PK / email indexes.
+
+-- Normalized status for the seat-status sync: manual SQL edits sometimes
+-- leave stray case/whitespace, so queries compare this stored column
+-- instead of running UPPER(TRIM(...)) per row.
+ALTER TABLE Orders
+    ADD COLUMN Status_Norm VARCHAR(20) GENERATED ALWAYS AS (UPPER(TRIM(COALESCE(Status, '')))) STORED,
+    ADD INDEX idx_orders_status_norm (Status_Norm);
+
+
+-- NOTE: no separate idx_seats_aircraft index — uq_seats_aircraft_row_col
+-- already leads with Aircraft_id, so per-aircraft seat lookups and counts
+-- are satisfied index-only (secondary indexes carry the PK Seat_id too).
+
+-- Numeric id suffixes as indexed generated columns, so the MAX()-based
+-- counter-seeding fallbacks are a reverse index scan instead of a
+-- CAST-per-row full table scan.
+ALTER TABLE Seats
+    ADD COLUMN Seat_num INT GENERATED ALWAYS AS (CAST(SUBSTRING(Seat_id, 2) AS UNSIGNED)) STORED,
+    ADD INDEX idx_seats_num (Seat_num);
+
+ALTER TABLE Aircrafts
+    ADD COLUMN Aircraft_num INT GENERATED ALWAYS AS (CAST(SUBSTRING(Aircraft_id, 4) AS UNSIGNED)) STORED,
+    ADD INDEX idx_aircrafts_num (Aircraft_num); 
 
 
 
@@ -838,3 +874,330 @@ INSERT INTO FlightCrew_Attendants (Attendant_id, Flight_id) VALUES
 
 
 
+
+
+-- Sync the denormalized Aircrafts.Seat_Count with the seeded Seats rows.
+UPDATE Aircrafts a
+SET Seat_Count = (SELECT COUNT(*) FROM Seats s WHERE s.Aircraft_id = a.Aircraft_id);
+
+
+-- Keep FlightSeats authoritative when Orders.Status is edited directly in
+-- SQL, so the app no longer has to run a sync-on-read before every search
+-- and seat-selection page. Mirrors _sync_seat_status_from_orders: only
+-- seats still 'Available' are flipped; Cancelled-Customer releases are
+-- handled by the cleanup in the app.
+DELIMITER $$
+CREATE TRIGGER trg_orders_status_seat_sync
+AFTER UPDATE ON Orders
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.Status <=> OLD.Status)
+       AND UPPER(TRIM(COALESCE(NEW.Status, ''))) <> 'CANCELLED-CUSTOMER' THEN
+        UPDATE FlightSeats fs
+        JOIN Tickets t ON t.FlightSeat_id = fs.FlightSeat_id
+        SET fs.Seat_Status = IF(
+            UPPER(TRIM(COALESCE(NEW.Status, ''))) = 'CANCELLED-SYSTEM',
+            'Blocked', 'Sold')
+        WHERE t.Order_code = NEW.Order_code
+          AND fs.Seat_Status = 'Available';
+    END IF;
+END$$
+DELIMITER ;
+
+
+-- Denormalized per-flight availability counter, so full/active status
+-- checks read one Flights row instead of COUNTing the seat map. The
+-- triggers below keep it exact using only OLD/NEW values (MySQL forbids
+-- reading FlightSeats inside its own triggers, which is also why
+-- Min_Price stays an aggregate in the search query rather than a column).
+ALTER TABLE Flights
+    ADD COLUMN Available_Seats INT NOT NULL DEFAULT 0;
+
+DELIMITER $$
+CREATE TRIGGER trg_fseat_ins_avail
+AFTER INSERT ON FlightSeats
+FOR EACH ROW
+BEGIN
+    IF NEW.Seat_Status = 'Available' THEN
+        UPDATE Flights SET Available_Seats = Available_Seats + 1
+        WHERE Flight_id = NEW.Flight_id;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_fseat_upd_avail
+AFTER UPDATE ON FlightSeats
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.Seat_Status <=> NEW.Seat_Status) THEN
+        UPDATE Flights
+        SET Available_Seats = Available_Seats
+            + (NEW.Seat_Status = 'Available')
+            - (OLD.Seat_Status = 'Available')
+        WHERE Flight_id = NEW.Flight_id;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_fseat_del_avail
+AFTER DELETE ON FlightSeats
+FOR EACH ROW
+BEGIN
+    IF OLD.Seat_Status = 'Available' THEN
+        UPDATE Flights SET Available_Seats = Available_Seats - 1
+        WHERE Flight_id = OLD.Flight_id;
+    END IF;
+END$$
+DELIMITER ;
+
+-- Backfill for rows seeded above (the triggers did not exist yet).
+UPDATE Flights f
+SET Available_Seats = (
+    SELECT COUNT(*) FROM FlightSeats fs
+    WHERE fs.Flight_id = f.Flight_id AND fs.Seat_Status = 'Available'
+);
+
+
+-- Arrival time as a stored, indexed column. A generated column cannot
+-- reference Flight_Routes, so Duration_Minutes is denormalized onto
+-- Flights at insert time and Arr_DateTime is generated from it.
+ALTER TABLE Flights
+    ADD COLUMN Duration_Minutes INT NOT NULL DEFAULT 0,
+    ADD COLUMN Arr_DateTime DATETIME
+        GENERATED ALWAYS AS (Dep_DateTime + INTERVAL Duration_Minutes MINUTE) STORED,
+    ADD INDEX idx_flights_arr (Arr_DateTime);
+
+-- Backfill for rows seeded above.
+UPDATE Flights f
+JOIN Flight_Routes fr ON fr.Route_id = f.Route_id
+SET f.Duration_Minutes = fr.Duration_Minutes;
+
+-- Search-page access paths: departure-date range scans and
+-- origin/destination route filtering.
+ALTER TABLE Flights
+    ADD INDEX idx_flights_dep (Dep_DateTime);
+
+ALTER TABLE Flight_Routes
+    ADD INDEX idx_routes_od (Origin_Airport_code, Destination_Airport_code);
+
+
+-- Customer orders page: filter by email (optionally status), newest
+-- first. Order_code lookups already hit the primary key, and the phone
+-- tables' composite PKs cover their email-prefix seeks.
+ALTER TABLE Orders
+    ADD INDEX idx_orders_email_status (Customer_Email, Status, Order_Date DESC);
+
+
+-- Customer/guest order cancellation as one server-side transaction:
+-- lock, validation, totals, price reset, seat release and status
+-- updates all happen in a single CALL, so the Orders row lock is held
+-- for local statement time instead of several client round trips.
+DROP PROCEDURE IF EXISTS sp_cancel_order;
+DELIMITER $$
+CREATE PROCEDURE sp_cancel_order(
+    IN  p_order_code VARCHAR(10),
+    IN  p_email      VARCHAR(80),
+    OUT p_result     VARCHAR(20),
+    OUT p_total      DECIMAL(10,2),
+    OUT p_fee        DECIMAL(10,2),
+    OUT p_refund     DECIMAL(10,2)
+)
+BEGIN
+    DECLARE v_status VARCHAR(20);
+    DECLARE v_flight VARCHAR(10);
+    DECLARE v_dep    DATETIME;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    SET p_total = 0, p_fee = 0, p_refund = 0;
+
+    START TRANSACTION;
+
+    SELECT o.Status, o.Flight_id, f.Dep_DateTime
+      INTO v_status, v_flight, v_dep
+    FROM Orders o
+    JOIN Flights f ON o.Flight_id = f.Flight_id
+    WHERE o.Order_code = p_order_code
+      AND o.Customer_Email = p_email
+    FOR UPDATE;
+
+    IF v_status IS NULL THEN
+        SET p_result = 'not_found';
+        ROLLBACK;
+    ELSEIF v_status IN ('Cancelled-Customer', 'Cancelled-System') THEN
+        SET p_result = 'already_cancelled';
+        ROLLBACK;
+    ELSEIF v_dep <= NOW() + INTERVAL 36 HOUR THEN
+        SET p_result = 'too_late';
+        ROLLBACK;
+    ELSE
+        -- Total before any price reset (historical purchase amounts).
+        SELECT COALESCE(SUM(Paid_Price), 0) INTO p_total
+        FROM Tickets
+        WHERE Order_code = p_order_code;
+
+        SET p_fee    = ROUND(p_total * 0.05, 2);
+        SET p_refund = GREATEST(p_total - p_fee, 0);
+
+        -- Reset the cancelled seats' price to the current price of the
+        -- same flight + seat class (excluding this order's own seats).
+        UPDATE FlightSeats fs_cancel
+        JOIN Tickets t_cancel
+          ON t_cancel.FlightSeat_id = fs_cancel.FlightSeat_id
+         AND t_cancel.Order_code = p_order_code
+        JOIN Seats s_cancel
+          ON s_cancel.Seat_id = fs_cancel.Seat_id
+        JOIN (
+            SELECT
+                fs2.Flight_id,
+                s2.Seat_Class,
+                COALESCE(
+                    MIN(CASE
+                            WHEN fs2.Seat_Status IN ('Available','Blocked')
+                            THEN fs2.Seat_Price
+                        END),
+                    MIN(fs2.Seat_Price)
+                ) AS class_price
+            FROM FlightSeats fs2
+            JOIN Seats s2 ON s2.Seat_id = fs2.Seat_id
+            LEFT JOIN Tickets tx
+              ON tx.FlightSeat_id = fs2.FlightSeat_id
+             AND tx.Order_code    = p_order_code
+            WHERE fs2.Flight_id = v_flight
+              AND fs2.Seat_Price IS NOT NULL
+              AND tx.FlightSeat_id IS NULL
+            GROUP BY fs2.Flight_id, s2.Seat_Class
+            HAVING class_price IS NOT NULL
+        ) p
+          ON p.Flight_id  = fs_cancel.Flight_id
+         AND p.Seat_Class = s_cancel.Seat_Class
+        SET fs_cancel.Seat_Price = p.class_price;
+
+        -- Release seats.
+        UPDATE FlightSeats fs
+        JOIN Tickets t ON t.FlightSeat_id = fs.FlightSeat_id
+        SET fs.Seat_Status = 'Available'
+        WHERE t.Order_code = p_order_code;
+
+        UPDATE Orders
+        SET Status = 'Cancelled-Customer',
+            Cancel_Date = NOW()
+        WHERE Order_code = p_order_code;
+
+        UPDATE Flights
+        SET Status = IF(Available_Seats = 0, 'Full-Occupied', 'Active')
+        WHERE Flight_id = v_flight
+          AND Status NOT IN ('Cancelled', 'Completed')
+          AND Status <> IF(Available_Seats = 0, 'Full-Occupied', 'Active');
+
+        SET p_result = 'ok';
+        COMMIT;
+    END IF;
+END$$
+DELIMITER ;
+
+
+-- Release seats of orders manually marked Cancelled-Customer in SQL,
+-- unless another non-cancelled order holds a ticket on the seat. Runs
+-- as a scheduled event so the customer orders page stays a pure read
+-- (requires event_scheduler = ON).
+DROP EVENT IF EXISTS ev_cleanup_cancelled_seats;
+DELIMITER $$
+CREATE EVENT ev_cleanup_cancelled_seats
+ON SCHEDULE EVERY 1 MINUTE
+DO
+BEGIN
+    UPDATE FlightSeats fs
+    JOIN Tickets t ON t.FlightSeat_id = fs.FlightSeat_id
+    JOIN Orders  o ON o.Order_code    = t.Order_code
+    SET fs.Seat_Status = 'Available'
+    WHERE o.Status_Norm = 'CANCELLED-CUSTOMER'
+      AND fs.Seat_Status = 'Sold'          -- never override Blocked
+      AND NOT EXISTS (
+          SELECT 1
+          FROM Tickets t2
+          JOIN Orders o2 ON o2.Order_code = t2.Order_code
+          WHERE t2.FlightSeat_id = fs.FlightSeat_id
+            AND o2.Status_Norm <> 'CANCELLED-CUSTOMER'
+      );
+
+    UPDATE Flights
+    SET Status = IF(Available_Seats = 0, 'Full-Occupied', 'Active')
+    WHERE Status NOT IN ('Cancelled', 'Completed')
+      AND Status <> IF(Available_Seats = 0, 'Full-Occupied', 'Active');
+END$$
+DELIMITER ;
+
+
+-- Booking-confirmation page reads (order row, customer phones, tickets)
+-- as three result sets from one CALL, instead of three client round trips.
+DROP PROCEDURE IF EXISTS sp_booking_confirmation;
+DELIMITER $$
+CREATE PROCEDURE sp_booking_confirmation(IN p_order_code VARCHAR(10))
+BEGIN
+    DECLARE v_email VARCHAR(80);
+    DECLARE v_type  VARCHAR(20);
+
+    SELECT Customer_Email, Customer_Type INTO v_email, v_type
+    FROM Orders
+    WHERE Order_code = p_order_code;
+
+    -- Result set 1: order details.
+    SELECT
+        o.Order_code,
+        o.Status AS Order_Status,
+        o.Customer_Email,
+        o.Customer_Type,
+        rc.First_Name  AS Reg_First_Name,
+        rc.Last_Name   AS Reg_Last_Name,
+        gc.First_Name  AS Guest_First_Name,
+        gc.Last_Name   AS Guest_Last_Name,
+        o.Flight_id,
+        f.Status AS Flight_Status,
+        fr.Origin_Airport_code,
+        fr.Destination_Airport_code,
+        a.Model AS AircraftModel,
+        -- Display strings and the departure delta formatted here, so
+        -- the client builds no datetime objects at all.
+        DATE_FORMAT(f.Dep_DateTime, '%d/%m/%Y %H:%i') AS Dep_str,
+        DATE_FORMAT(f.Arr_DateTime, '%d/%m/%Y %H:%i') AS Arr_str,
+        DATE_FORMAT(o.Order_Date,   '%d/%m/%Y %H:%i') AS OrderDate_str,
+        TIMESTAMPDIFF(SECOND, NOW(), f.Dep_DateTime)  AS Seconds_To_Dep
+    FROM Orders o
+    LEFT JOIN Flights       f  ON o.Flight_id = f.Flight_id
+    LEFT JOIN Flight_Routes fr ON f.Route_id  = fr.Route_id
+    LEFT JOIN Aircrafts     a  ON f.Aircraft_id = a.Aircraft_id
+    LEFT JOIN Register_Customers rc ON rc.Customer_Email = o.Customer_Email
+    LEFT JOIN Guest_Customers gc     ON gc.Customer_Email = o.Customer_Email
+    WHERE o.Order_code = p_order_code;
+
+    -- Result set 2: customer phones. Only the arm matching the order's
+    -- customer type returns rows (a guest who later registered may exist
+    -- in both tables).
+    SELECT Phone_Number
+    FROM Register_Customers_Phones
+    WHERE Customer_Email = LOWER(v_email) AND v_type = 'Register'
+    UNION ALL
+    SELECT Phone_Number
+    FROM Guest_Customers_Phones
+    WHERE Customer_Email = LOWER(v_email) AND v_type <> 'Register'
+    ORDER BY Phone_Number;
+
+    -- Result set 3: tickets with historical paid prices; the window
+    -- aggregates save per-ticket summing and float rounding on the
+    -- client (fee/refund stay in DECIMAL end to end).
+    SELECT t.FlightSeat_id,
+           t.Paid_Price AS Seat_Price,
+           s.Row_Num, s.Col_Num, s.Seat_Class,
+           CAST(SUM(t.Paid_Price) OVER () AS DECIMAL(10,2))                 AS Order_Total,
+           CAST(SUM(t.Paid_Price) OVER () * 0.05 AS DECIMAL(10,2))         AS Cancel_Fee,
+           CAST(GREATEST(SUM(t.Paid_Price) OVER () * 0.95, 0) AS DECIMAL(10,2)) AS Cancel_Refund
+    FROM Tickets t
+    JOIN FlightSeats fs ON fs.FlightSeat_id = t.FlightSeat_id
+    JOIN Seats       s  ON s.Seat_id        = fs.Seat_id
+    WHERE t.Order_code = p_order_code
+    ORDER BY s.Seat_Class DESC, s.Row_Num, s.Col_Num;
+END$$
+DELIMITER ;
@@ -7,17 +7,25 @@ Routes:
 - /logout         : clear the session and redirect to login
 """
 
-from datetime import datetime, date
+from datetime import date
+import hmac
 import re
 
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+import bcrypt
+from flask import (
+    Blueprint,
+    current_app,
+    render_template,
+    request,
+    redirect,
+    url_for,
+    session,
+    flash,
+)
 from mysql.connector import Error
 
 from db import get_db_connection
 
-# If you later decide to hash passwords:
-# from werkzeug.security import generate_password_hash, check_password_hash
-
 auth_bp = Blueprint("auth", __name__)
 
 # ----------------------------------------------------------------------
@@ -28,24 +36,53 @@ EMAIL_RE = re.compile(r"^[^@]+@[^@]+\.[^@]+$")
 PHONE_MIN_LEN = 7
 PHONE_MAX_LEN = 15
 
+# Phones: strip separators, then digits only within the length range
+PHONE_STRIP_RE = re.compile(r"[ \-]")
+PHONE_RE = re.compile(r"^\d{%d,%d}$" % (PHONE_MIN_LEN, PHONE_MAX_LEN))
+
 # Names: English letters only, spaces, hyphens, apostrophes, length 2–50
 NAME_RE = re.compile(r"^[A-Za-z][A-Za-z\s'\-]{1,49}$")
 
 # Passport: EXACTLY 8 digits (numeric only)
 PASSPORT_RE = re.compile(r"^\d{8}$")
 
+BCRYPT_ROUNDS = 12
+
+# Fixed hash verified when no account matches the identifier, so login
+# latency does not reveal whether the email / manager id exists.
+DUMMY_BCRYPT_HASH = b"$2b$12$/wAe.81hPY5dlLOxx9XcVuFbaJSAOo8RL9GJFGC/Kls1VzT6uuQ3W"
+
+
+def _check_password(password: str, stored: str) -> bool:
+    """
+    Verify a password against the stored value.
+
+    New accounts store a bcrypt hash; rows created before hashing was
+    introduced still hold plaintext, so fall back to a constant-time
+    equality check for those.
+    """
+    password_b = password.encode("utf-8")
+    stored_b = (stored or "").encode("utf-8")
+    if stored_b.startswith(b"$2"):
+        try:
+            return bcrypt.checkpw(password_b, stored_b)
+        except ValueError:
+            # Legacy plaintext that merely starts with "$2" is not a
+            # valid bcrypt hash ("Invalid salt") — compare it as such.
+            pass
+    # compare_digest on str raises TypeError for non-ASCII input, so
+    # always compare the encoded bytes.
+    return hmac.compare_digest(password_b, stored_b)
+
 
 def _normalize_phone(phone: str) -> str:
     """Remove spaces and dashes from a phone string."""
-    return phone.replace(" ", "").replace("-", "")
+    return PHONE_STRIP_RE.sub("", phone)
 
 
 def _is_valid_phone(phone: str) -> bool:
     """Simple phone validation: digits only after normalization, with length range."""
-    if not phone:
-        return False
-    digits = _normalize_phone(phone)
-    return digits.isdigit() and PHONE_MIN_LEN <= len(digits) <= PHONE_MAX_LEN
+    return bool(phone) and PHONE_RE.match(PHONE_STRIP_RE.sub("", phone)) is not None
 
 
 # ----------------------------------------------------------------------
@@ -88,7 +125,9 @@ def login():
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
+            # prepared=True: constant SQL is parsed/planned once per pooled
+            # connection and only parameters travel on later executions
+            cursor = conn.cursor(dictionary=True, prepared=True)
 
             # ----------------- MANAGER LOGIN -----------------
             if user_type == "manager":
@@ -104,10 +143,12 @@ def login():
                 )
                 manager = cursor.fetchone()
                 if not manager:
+                    # Burn the same hashing cost as a real check (anti-enumeration)
+                    bcrypt.checkpw(password.encode("utf-8"), DUMMY_BCRYPT_HASH)
                     flash("Manager not found (invalid ID).", "error")
                     return render_template("login.html", mode="manager")
 
-                if password != manager["Manager_Password"]:
+                if not _check_password(password, manager["Manager_Password"]):
                     flash("Incorrect password for manager.", "error")
                     return render_template("login.html", mode="manager")
 
@@ -123,7 +164,7 @@ def login():
 
             # ----------------- CUSTOMER LOGIN -----------------
             else:
-                email = (identifier_raw or "").strip().lower()
+                email = identifier_raw.lower()  # already stripped above
 
                 if not EMAIL_RE.match(email):
                     flash("Invalid email address format.", "error")
@@ -136,18 +177,20 @@ def login():
                            First_Name,
                            Last_Name
                     FROM Register_Customers
-                    WHERE LOWER(Customer_Email) = %s
+                    WHERE Customer_Email = %s
                     """,
                     (email,),
                 )
                 customer = cursor.fetchone()
 
                 if not customer:
+                    # Burn the same hashing cost as a real check (anti-enumeration)
+                    bcrypt.checkpw(password.encode("utf-8"), DUMMY_BCRYPT_HASH)
                     cursor.execute(
                         """
                         SELECT Customer_Email
                         FROM Guest_Customers
-                        WHERE LOWER(Customer_Email) = %s
+                        WHERE Customer_Email = %s
                         """,
                         (email,),
                     )
@@ -167,7 +210,7 @@ def login():
                     )
                     return render_template("login.html", mode="customer")
 
-                if password != customer["Customer_Password"]:
+                if not _check_password(password, customer["Customer_Password"]):
                     flash("Incorrect password for customer.", "error")
                     return render_template("login.html", mode="customer")
 
@@ -181,8 +224,8 @@ def login():
                 flash("Signed in as customer.", "success")
                 return redirect(url_for("main.customer_home"))
 
-        except Error as e:
-            print("DB error in login():", e)
+        except Error:
+            current_app.logger.exception("DB error in login()")
             flash("Internal error. Please try again later.", "error")
             return render_template("login.html", mode=user_type)
 
@@ -212,19 +255,20 @@ def register():
     3) Both Guest and Register exist (old leftover)  → UPDATE existing Register row
        with new details, merge phones, update Orders, delete Guest rows.
     """
-    today_str = date.today().isoformat()
-
     if request.method == "POST":
-        email = (request.form.get("email") or "").strip().lower()
-        password = request.form.get("password", "")
-        confirm = request.form.get("confirm", "")
-        first_name = (request.form.get("first_name") or "").strip()
-        last_name = (request.form.get("last_name") or "").strip()
-        passport_no = (request.form.get("passport_no") or "").strip()
-        birth_date = (request.form.get("birth_date") or "").strip()
+        today = date.today()
+        today_str = today.isoformat()  # only needed when re-rendering the form
+        f = request.form  # snapshot: avoid repeated proxy/MultiDict lookups
+        email = (f.get("email") or "").strip().lower()
+        password = f.get("password", "")
+        confirm = f.get("confirm", "")
+        first_name = (f.get("first_name") or "").strip()
+        last_name = (f.get("last_name") or "").strip()
+        passport_no = (f.get("passport_no") or "").strip()
+        birth_date = (f.get("birth_date") or "").strip()
 
         # NEW: unlimited phones inputs named "phones"
-        raw_phones = [(p or "").strip() for p in request.form.getlist("phones")]
+        raw_phones = [(p or "").strip() for p in f.getlist("phones")]
 
         errors = []
         birth_date_value = None
@@ -281,8 +325,7 @@ def register():
             errors.append("Birth date is required.")
         else:
             try:
-                birth_date_value = datetime.strptime(birth_date, "%Y-%m-%d").date()
-                today = date.today()
+                birth_date_value = date.fromisoformat(birth_date)
                 if birth_date_value > today:
                     errors.append("Birth date cannot be in the future.")
                 else:
@@ -293,7 +336,8 @@ def register():
                 errors.append("Invalid birth date format. Please use YYYY-MM-DD.")
 
         # --- Phones (NOW REQUIRED: at least one) ---
-        phones_clean = []
+        # dict preserves insertion order and dedupes with O(1) lookups
+        phones_seen = {}
         for idx, p in enumerate(raw_phones, start=1):
             if not p:
                 continue
@@ -302,9 +346,8 @@ def register():
                     f"Phone {idx} is invalid. Use digits only (7–15 digits; spaces/dashes allowed)."
                 )
             else:
-                normalized = _normalize_phone(p)
-                if normalized not in phones_clean:
-                    phones_clean.append(normalized)
+                phones_seen[_normalize_phone(p)] = None
+        phones_clean = list(phones_seen)
 
         # REQUIRED: at least one phone
         if not phones_clean:
@@ -319,31 +362,43 @@ def register():
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
+            # prepared=True: constant SQL is parsed/planned once per pooled
+            # connection and only parameters travel on later executions
+            cursor = conn.cursor(dictionary=True, prepared=True)
             conn.start_transaction()
 
-            # Look for existing REGISTERED and/or GUEST for this email
+            # Look for existing REGISTERED and/or GUEST rows plus guest phones
+            # for this email in a single round-trip (tagged UNION ALL).
             cursor.execute(
                 """
-                SELECT Customer_Email, First_Name, Last_Name, Passport_No, Birth_Date
+                SELECT 'R' AS src, First_Name, Last_Name, NULL AS Phone_Number
                 FROM Register_Customers
-                WHERE LOWER(Customer_Email) = %s
-                """,
-                (email,),
-            )
-            registered = cursor.fetchone()
-
-            cursor.execute(
-                """
-                SELECT Customer_Email, First_Name, Last_Name
+                WHERE Customer_Email = %s
+                UNION ALL
+                SELECT 'G', First_Name, Last_Name, NULL
                 FROM Guest_Customers
-                WHERE LOWER(Customer_Email) = %s
+                WHERE Customer_Email = %s
+                UNION ALL
+                SELECT 'P', NULL, NULL, Phone_Number
+                FROM Guest_Customers_Phones
+                WHERE Customer_Email = %s
                 """,
-                (email,),
+                (email, email, email),
+            )
+            registered = None
+            guest = None
+            guest_phones = []
+            for row in cursor.fetchall() or []:
+                if row["src"] == "R":
+                    registered = row
+                elif row["src"] == "G":
+                    guest = row
+                else:  # 'P'
+                    guest_phones.append(row["Phone_Number"])
+
+            current_app.logger.debug(
+                "register(): registered=%r guest=%r", registered, guest
             )
-            guest = cursor.fetchone()
-
-            print("DEBUG register(): registered =", registered, "guest =", guest)
 
             # ------- CASE 1: only registered exists (no guest) -------
             if registered and not guest:
@@ -351,107 +406,56 @@ def register():
                 conn.rollback()
                 return render_template("register.html", today_str=today_str)
 
-            # Collect phones from guest if exists
-            guest_phones = []
-            if guest:
-                cursor.execute(
-                    """
-                    SELECT Phone_Number
-                    FROM Guest_Customers_Phones
-                    WHERE LOWER(Customer_Email) = %s
-                    """,
-                    (email,),
-                )
-                rows = cursor.fetchall() or []
-                guest_phones = [r["Phone_Number"] for r in rows]
-
             # Merge phones: existing guest phones + new phones from form
-            all_phones = []
-            for p in guest_phones + phones_clean:
-                norm = _normalize_phone(p)
-                if norm and norm not in all_phones:
-                    all_phones.append(norm)
-
-            plain_password = password
-
-            # ------- CASE 2: only guest exists -> create new registered -------
-            if guest and not registered:
-                cursor.execute(
-                    """
-                    INSERT INTO Register_Customers
-                        (Customer_Email, First_Name, Last_Name,
-                         Passport_No, Registration_Date, Birth_Date, Customer_Password)
-                    VALUES (%s, %s, %s, %s, NOW(), %s, %s)
-                    """,
-                    (
-                        email,
-                        first_name,
-                        last_name,
-                        passport_for_db,
-                        birth_date_value,
-                        plain_password,
-                    ),
+            # (phones_clean is already normalized; only guest rows need it)
+            all_phones = list(
+                dict.fromkeys(
+                    [_normalize_phone(p) for p in guest_phones if p] + phones_clean
                 )
+            )
 
-            # ------- CASE 3: both guest AND registered exist -> merge/update -------
-            elif guest and registered:
-                cursor.execute(
-                    """
-                    UPDATE Register_Customers
-                    SET First_Name = %s,
-                        Last_Name = %s,
-                        Passport_No = %s,
-                        Birth_Date = %s,
-                        Customer_Password = %s
-                    WHERE LOWER(Customer_Email) = %s
-                    """,
-                    (
-                        first_name,
-                        last_name,
-                        passport_for_db,
-                        birth_date_value,
-                        plain_password,
-                        email,
-                    ),
-                )
+            pw_hash = bcrypt.hashpw(
+                password.encode("utf-8"), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+            ).decode("ascii")
 
-            # ------- CASE 4: neither guest nor registered (brand new user) -------
-            elif not guest and not registered:
-                cursor.execute(
-                    """
-                    INSERT INTO Register_Customers
-                        (Customer_Email, First_Name, Last_Name,
-                         Passport_No, Registration_Date, Birth_Date, Customer_Password)
-                    VALUES (%s, %s, %s, %s, NOW(), %s, %s)
-                    """,
-                    (
-                        email,
-                        first_name,
-                        last_name,
-                        passport_for_db,
-                        birth_date_value,
-                        plain_password,
-                    ),
-                )
+            # ------- CASES 2/3/4: upsert the registered row -------
+            # One atomic statement covers "guest only" (new row), "both
+            # exist" (update leftover row) and "brand new" (new row);
+            # case 1 was already rejected above.
+            cursor.execute(
+                """
+                INSERT INTO Register_Customers
+                    (Customer_Email, First_Name, Last_Name,
+                     Passport_No, Registration_Date, Birth_Date, Customer_Password)
+                VALUES (%s, %s, %s, %s, NOW(), %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    First_Name = VALUES(First_Name),
+                    Last_Name = VALUES(Last_Name),
+                    Passport_No = VALUES(Passport_No),
+                    Birth_Date = VALUES(Birth_Date),
+                    Customer_Password = VALUES(Customer_Password)
+                """,
+                (
+                    email,
+                    first_name,
+                    last_name,
+                    passport_for_db,
+                    birth_date_value,
+                    pw_hash,
+                ),
+            )
 
-            # Insert phones into Register_Customers_Phones
-            for p in all_phones:
-                cursor.execute(
+            # Insert phones into Register_Customers_Phones in one batch;
+            # INSERT IGNORE lets the unique key swallow already-known phones
+            # instead of a SELECT + INSERT round-trip per phone.
+            if all_phones:
+                cursor.executemany(
                     """
-                    SELECT 1
-                    FROM Register_Customers_Phones
-                    WHERE LOWER(Customer_Email) = %s AND Phone_Number = %s
+                    INSERT IGNORE INTO Register_Customers_Phones (Customer_Email, Phone_Number)
+                    VALUES (%s, %s)
                     """,
-                    (email, p),
+                    [(email, p) for p in all_phones],
                 )
-                if not cursor.fetchone():
-                    cursor.execute(
-                        """
-                        INSERT INTO Register_Customers_Phones (Customer_Email, Phone_Number)
-                        VALUES (%s, %s)
-                        """,
-                        (email, p),
-                    )
 
             # If there was a guest profile -> migrate orders & delete guest rows
             if guest:
@@ -459,7 +463,7 @@ def register():
                     """
                     UPDATE Orders
                     SET Customer_Type = 'Register'
-                    WHERE LOWER(Customer_Email) = %s
+                    WHERE Customer_Email = %s
                     """,
                     (email,),
                 )
@@ -467,14 +471,14 @@ def register():
                 cursor.execute(
                     """
                     DELETE FROM Guest_Customers_Phones
-                    WHERE LOWER(Customer_Email) = %s
+                    WHERE Customer_Email = %s
                     """,
                     (email,),
                 )
                 cursor.execute(
                     """
                     DELETE FROM Guest_Customers
-                    WHERE LOWER(Customer_Email) = %s
+                    WHERE Customer_Email = %s
                     """,
                     (email,),
                 )
@@ -493,7 +497,7 @@ def register():
             return redirect(url_for("auth.login", role="customer"))
 
         except Error as e:
-            print("DB error in register():", e)
+            current_app.logger.exception("DB error in register()")
             if conn:
                 conn.rollback()
 
@@ -528,7 +532,7 @@ def register():
     prefill_email = (request.args.get("email") or "").strip().lower()
     return render_template(
         "register.html",
-        today_str=today_str,
+        today_str=date.today().isoformat(),
         prefill_email=prefill_email,
     )
 
@@ -11,6 +11,9 @@ DB_CONFIG = {
     "database": "flytau",
 }
 
+# Number of pooled MySQL connections kept open by the app
+DB_POOL_SIZE = 10
+
 # Session security settings
 SESSION_SETTINGS = {
     "SESSION_COOKIE_HTTPONLY": True,
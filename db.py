@@ -1,11 +1,22 @@
-import mysql.connector
+from mysql.connector.pooling import MySQLConnectionPool
 from flask import current_app
 
+from config import DB_POOL_SIZE
+
 
 def get_db_connection():
     """
-    Create and return a new MySQL connection using DB_CONFIG from main.config.
-    Must be called inside an application context.
+    Return a pooled MySQL connection from the pool created in create_main().
+    Must be called inside an application context. conn.close() returns the
+    connection to the pool instead of tearing it down.
     """
-    db_config = current_app.config["DB_CONFIG"]
-    return mysql.connector.connect(**db_config)
\ No newline at end of file
+    pool = current_app.extensions.get("db_pool")
+    if pool is None:
+        # Fallback when startup pool creation failed (DB was not up yet).
+        pool = MySQLConnectionPool(
+            pool_name="flytau",
+            pool_size=DB_POOL_SIZE,
+            **current_app.config["DB_CONFIG"],
+        )
+        current_app.extensions["db_pool"] = pool
+    return pool.get_connection()
@@ -1,8 +1,14 @@
 from flask import Flask, session, request, redirect, url_for, abort
-from config import SECRET_KEY, DB_CONFIG, SESSION_SETTINGS
+from mysql.connector import Error
+from mysql.connector.pooling import MySQLConnectionPool
+
+from config import SECRET_KEY, DB_CONFIG, DB_POOL_SIZE, SESSION_SETTINGS
 from auth_routes import auth_bp
 from main_routes import main_bp
 
+# Endpoints that must never become the "last valid URL"
+_IGNORED_ENDPOINTS = frozenset({"static", "auth.logout"})
+
 def create_main():
     main = Flask(__name__, template_folder="templates", static_folder="static")
     main.secret_key = SECRET_KEY
@@ -10,6 +16,17 @@ def create_main():
     for k, v in SESSION_SETTINGS.items():
         main.config[k] = v
 
+    # Open the MySQL connection pool once at startup; get_db_connection()
+    # hands out pooled connections and conn.close() returns them to the pool.
+    try:
+        main.extensions["db_pool"] = MySQLConnectionPool(
+            pool_name="flytau", pool_size=DB_POOL_SIZE, **DB_CONFIG
+        )
+    except Error as e:
+        # MySQL not reachable yet (e.g. tooling without a DB) — the pool is
+        # then created lazily on the first get_db_connection() call.
+        main.logger.warning("DB pool init failed (will retry lazily): %s", e)
+
     main.register_blueprint(main_bp)
     main.register_blueprint(auth_bp)
 
@@ -19,14 +36,21 @@ def create_main():
         Store the last successful, non-static GET URL (HTTP 200) in the session,
         so we can redirect the user back to it on 404/405 errors.
         """
-        # Save only valid pages (GET + 200)
-        if request.method == "GET" and response.status_code == 200 and request.endpoint:
-            # Ignore static files and logout endpoint
-            if not request.endpoint.startswith("static") and request.endpoint != "auth.logout":
-                full = request.full_path or request.path
-                if full.endswith("?"):
-                    full = full[:-1]
-                session["last_valid_url"] = full
+        # Save only valid pages (GET + 200); bail out early on the hot
+        # static-asset path before touching endpoint/session at all.
+        if request.method != "GET" or response.status_code != 200:
+            return response
+        ep = request.endpoint
+        if not ep or ep in _IGNORED_ENDPOINTS or ep.startswith("static"):
+            return response
+
+        full = request.full_path or request.path
+        if full.endswith("?"):
+            full = full[:-1]
+        # Only assign when changed: an untouched session skips the
+        # re-sign + Set-Cookie on the way out.
+        if session.get("last_valid_url") != full:
+            session["last_valid_url"] = full
         return response
 
     def back_to_last(_err):
@@ -34,19 +58,21 @@ def create_main():
         Error handler for 404/405: redirect to the last valid page when possible,
         otherwise fall back to a role-based home/login page.
         """
-        # Do not interfere with static paths
+        # Do not interfere with static paths — return the plain error
+        # before any session access (bot 404s on /static/* stay cheap).
         if request.path.startswith("/static/"):
             return _err
 
-        last = session.get("last_valid_url")
+        s = session
+        last = s.get("last_valid_url")
         if last:
             return redirect(last, code=302)
 
         # Fallback if there is no stored last URL (for new session)
-        role = session.get("role")
+        role = s.get("role")
         if role == "manager":
             return redirect(url_for("main.manager_home"))
-        if role == "customer" and session.get("customer_email"):
+        if role == "customer" and s.get("customer_email"):
             return redirect(url_for("main.customer_home"))
         return redirect(url_for("auth.login", role="customer"))
 
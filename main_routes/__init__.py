@@ -4,7 +4,10 @@ Defines the main Blueprint and shared helpers,
 and imports submodules (home, flights, crew, booking) that register routes.
 """
 
-from flask import Blueprint, render_template, session, redirect, url_for, flash
+from functools import lru_cache
+from types import MappingProxyType
+
+from flask import Blueprint, g, render_template, session, redirect, url_for, flash
 
 main_bp = Blueprint("main", __name__)
 
@@ -15,17 +18,19 @@ main_bp = Blueprint("main", __name__)
 # More than 6 hours - long-haul
 LONG_FLIGHT_THRESHOLD_MINUTES = 360
 
-# crew requirements by flight profile
-CREW_REQUIREMENTS = {
+# crew requirements by flight profile (read-only: these are config, not state)
+CREW_REQUIREMENTS = MappingProxyType({
     "short": {"pilots": 2, "attendants": 3, "long_required": False},
     "long": {"pilots": 3, "attendants": 6, "long_required": True},
-}
+})
 
 # default price per seat class (base values)
-SEAT_DEFAULT_PRICE_BY_CLASS = {
+SEAT_DEFAULT_PRICE_BY_CLASS = MappingProxyType({
     "Business": 1200.0,
     "Economy": 400.0,
-}
+})
+
+_ECONOMY_FALLBACK = SEAT_DEFAULT_PRICE_BY_CLASS.get("Economy", 400.0)
 
 
 # --------------------------------------------------
@@ -35,10 +40,14 @@ SEAT_DEFAULT_PRICE_BY_CLASS = {
 
 def _require_manager() -> bool:
     """Return True if current session is a manager, otherwise flash error."""
-    if session.get("role") != "manager":
+    # Memoized on flask.g so repeated checks within one request skip the
+    # session proxy / cookie-deserialization path.
+    ok = g.get("_is_manager")
+    if ok is None:
+        ok = g._is_manager = session.get("role") == "manager"
+    if not ok:
         flash("Manager account required.", "error")
-        return False
-    return True
+    return ok
 
 
 def _require_customer() -> bool:
@@ -49,12 +58,18 @@ def _require_customer() -> bool:
         role = 'customer'
         customer_email = their email address.
     """
-    if session.get("role") != "customer" or not session.get("customer_email"):
+    ok = g.get("_is_customer")
+    if ok is None:
+        s = session
+        ok = g._is_customer = (
+            s.get("role") == "customer" and bool(s.get("customer_email"))
+        )
+    if not ok:
         flash("Registered customer identification is required.", "error")
-        return False
-    return True
+    return ok
 
 
+@lru_cache(maxsize=4096)
 def _flight_profile(duration_minutes: int) -> str:
     """Return 'short' or 'long' according to duration in minutes."""
     if duration_minutes >= LONG_FLIGHT_THRESHOLD_MINUTES:
@@ -62,12 +77,14 @@ def _flight_profile(duration_minutes: int) -> str:
     return "short"
 
 
+@lru_cache(maxsize=4096)
 def _crew_requirements(duration_minutes: int) -> dict:
     """Return required crew sizes and long-haul flag for a given duration."""
     profile = _flight_profile(duration_minutes)
     return CREW_REQUIREMENTS[profile]
 
 
+@lru_cache(maxsize=None)
 def _get_default_seat_price(seat_class: str) -> float:
     """
     Return default price for seat_class (fallback to Economy).
@@ -76,11 +93,8 @@ def _get_default_seat_price(seat_class: str) -> float:
     of FlightSeats creation in flights.py.
     """
     if not seat_class:
-        return SEAT_DEFAULT_PRICE_BY_CLASS.get("Economy", 400.0)
-    return SEAT_DEFAULT_PRICE_BY_CLASS.get(
-        seat_class,
-        SEAT_DEFAULT_PRICE_BY_CLASS.get("Economy", 400.0),
-    )
+        return _ECONOMY_FALLBACK
+    return SEAT_DEFAULT_PRICE_BY_CLASS.get(seat_class, _ECONOMY_FALLBACK)
 
 
 # VERY IMPORTANT: import submodules so their @main_bp.route
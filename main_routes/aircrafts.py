@@ -19,14 +19,91 @@ Assumptions:
 """
 
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain
 
-from flask import render_template, redirect, url_for, request, flash
+from flask import render_template, redirect, url_for, request, flash, current_app
 from mysql.connector import Error, errorcode
 
 from db import get_db_connection
 from . import main_bp, _require_manager
 
 
+# -------------------------------------------------------------------
+# SQL statements (module-level so prepared cursors can reuse the
+# server-side plan across requests instead of reparsing per call)
+# -------------------------------------------------------------------
+
+SQL_RESERVE_SEAT_COUNTER = """
+    INSERT INTO IdCounters (Name, NextNum)
+    VALUES (%s, (SELECT COALESCE(MAX(Seat_num), 0) + 1 + %s FROM Seats))
+    ON DUPLICATE KEY UPDATE NextNum = LAST_INSERT_ID(NextNum) + %s
+"""
+
+SQL_RESERVE_AIRCRAFT_COUNTER = """
+    INSERT INTO IdCounters (Name, NextNum)
+    VALUES (%s, (SELECT COALESCE(MAX(Aircraft_num), 0) + 1 + %s FROM Aircrafts))
+    ON DUPLICATE KEY UPDATE NextNum = LAST_INSERT_ID(NextNum) + %s
+"""
+
+SQL_COUNTER_SEEDED_START = "SELECT NextNum - %s FROM IdCounters WHERE Name = %s"
+
+SQL_COUNTER_LAST_ID = "SELECT LAST_INSERT_ID()"
+
+SQL_INSERT_SEAT_GRID = """
+    INSERT INTO Seats (Seat_id, Aircraft_id, Row_Num, Col_Num, Seat_Class)
+    WITH RECURSIVE r(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM r WHERE i + 1 < %s),
+                   c(j) AS (SELECT 0 UNION ALL SELECT j + 1 FROM c WHERE j + 1 < %s),
+                   g(n, i, j) AS (SELECT %s + r.i * %s + c.j, r.i, c.j FROM r CROSS JOIN c)
+    SELECT CONCAT('S', IF(n < 1000, LPAD(n, 3, '0'), n)),
+           %s,
+           %s + g.i + 1,
+           g.j + 1,
+           %s
+    FROM g
+"""
+
+SQL_LIST_FLEET = """
+    SELECT
+        Aircraft_id,
+        Manufacturer,
+        Model,
+        Size,
+        Purchase_Date,
+        Seat_Count AS SeatCount
+    FROM Aircrafts
+    ORDER BY Aircraft_id
+"""
+
+SQL_GET_AIRCRAFT = """
+    SELECT
+        Aircraft_id,
+        Manufacturer,
+        Model,
+        Size,
+        Purchase_Date
+    FROM Aircrafts
+    WHERE Aircraft_id = %s
+"""
+
+SQL_INSERT_AIRCRAFT = """
+    INSERT INTO Aircrafts (Aircraft_id, Manufacturer, Model, Size, Purchase_Date)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+SQL_DELETE_AIRCRAFT_SEATS = "DELETE FROM Seats WHERE Aircraft_id = %s"
+
+SQL_UPDATE_SEAT_COUNT = "UPDATE Aircrafts SET Seat_Count = %s WHERE Aircraft_id = %s"
+
+
+# Ordered lists drive the form dropdowns; the frozensets give O(1)
+# membership checks when validating the POSTed values.
+MANUFACTURERS = ["Boeing", "Airbus", "Dasso"]
+SIZES = ["Small", "Large"]
+VALID_MANUFACTURERS = frozenset(MANUFACTURERS)
+VALID_SIZES = frozenset(SIZES)
+
+
 # -------------------------------------------------------------------
 # Generic helpers for ID generation
 # -------------------------------------------------------------------
@@ -40,17 +117,12 @@ def _get_next_seat_number(cursor) -> int:
     NOTE:
     This MAX-based approach is NOT safe under concurrency.
     We keep it as a fallback when IdCounters is not available.
+
+    Expects a plain (tuple) cursor.
     """
-    cursor.execute(
-        """
-        SELECT MAX(CAST(SUBSTRING(Seat_id, 2) AS UNSIGNED)) AS max_num
-        FROM Seats
-        WHERE UPPER(LEFT(Seat_id, 1)) = 'S'
-        """
-    )
+    cursor.execute("SELECT MAX(Seat_num) FROM Seats")
     row = cursor.fetchone()
-    current_max = row["max_num"] or 0
-    return int(current_max) + 1
+    return int(row[0] or 0) + 1
 
 
 def _reserve_seat_block(cursor, amount: int) -> int:
@@ -59,67 +131,33 @@ def _reserve_seat_block(cursor, amount: int) -> int:
     Requires table:
         IdCounters(Name PK, NextNum BIGINT)
     Name used: 'Seat'
+
+    Expects a plain (tuple) cursor — these are single-scalar fetches, so
+    the per-row dict a dictionary cursor builds is wasted work.
     """
     if amount <= 0:
         raise ValueError("amount must be positive")
 
     try:
-        cursor.execute(
-            "SELECT NextNum FROM IdCounters WHERE Name = %s FOR UPDATE",
-            ("Seat",),
-        )
-        row = cursor.fetchone()
-
-        if row is None:
-            # First time: derive starting value from existing Seats.
-            cursor.execute(
-                """
-                SELECT COALESCE(MAX(CAST(SUBSTRING(Seat_id, 2) AS UNSIGNED)), 0) AS max_num
-                FROM Seats
-                WHERE UPPER(LEFT(Seat_id, 1)) = 'S'
-                FOR UPDATE
-                """
-            )
-            m = cursor.fetchone()
-            start = int((m or {}).get("max_num", 0) or 0) + 1
-
-            try:
-                cursor.execute(
-                    "INSERT INTO IdCounters (Name, NextNum) VALUES (%s, %s)",
-                    ("Seat", start + amount),
-                )
-            except Error as e:
-                # Handle race: another transaction inserted Seat counter
-                if getattr(e, "errno", None) == errorcode.ER_DUP_ENTRY:
-                    cursor.execute(
-                        "SELECT NextNum FROM IdCounters WHERE Name = %s FOR UPDATE",
-                        ("Seat",),
-                    )
-                    row2 = cursor.fetchone()
-                    if not row2:
-                        raise
-                    start = int(row2["NextNum"])
-                    cursor.execute(
-                        "UPDATE IdCounters SET NextNum = %s WHERE Name = %s",
-                        (start + amount, "Seat"),
-                    )
-                else:
-                    raise
-
-            return start
-
-        # Counter row already exists
-        start = int(row["NextNum"])
-        cursor.execute(
-            "UPDATE IdCounters SET NextNum = %s WHERE Name = %s",
-            (start + amount, "Seat"),
-        )
-        return start
+        # Single upsert covers both the steady state and first-time init:
+        # an existing row is bumped atomically (LAST_INSERT_ID(expr) trick),
+        # and a missing row is seeded from MAX(Seat_num) inside the same
+        # statement — no SELECT ... FOR UPDATE and no duplicate-key retry.
+        cursor.execute(SQL_RESERVE_SEAT_COUNTER, ("Seat", amount, amount))
+        if cursor.rowcount == 1:
+            # Fresh counter row: the insert does not set LAST_INSERT_ID(),
+            # so read back the seeded value and subtract the block size.
+            cursor.execute(SQL_COUNTER_SEEDED_START, (amount, "Seat"))
+        else:
+            # rowcount == 2 means the dup-key UPDATE ran; LAST_INSERT_ID()
+            # holds the pre-increment NextNum, i.e. our block start.
+            cursor.execute(SQL_COUNTER_LAST_ID)
+        return int(cursor.fetchone()[0])
 
     except Error as e:
         if getattr(e, "errno", None) == errorcode.ER_NO_SUCH_TABLE:
-            print(
-                "WARNING: IdCounters table missing; falling back to MAX()+1 (not concurrency-safe)."
+            current_app.logger.warning(
+                "IdCounters table missing; falling back to MAX()+1 (not concurrency-safe)."
             )
             return _get_next_seat_number(cursor)
         raise
@@ -133,17 +171,12 @@ def _get_next_aircraft_number(cursor) -> int:
 
     We always parse from position 4 onwards as the numeric part (if any),
     and we only consider IDs starting with 'AC'.
+
+    Expects a plain (tuple) cursor.
     """
-    cursor.execute(
-        """
-        SELECT MAX(CAST(SUBSTRING(Aircraft_id, 4) AS UNSIGNED)) AS max_num
-        FROM Aircrafts
-        WHERE UPPER(LEFT(Aircraft_id, 2)) = 'AC'
-        """
-    )
+    cursor.execute("SELECT MAX(Aircraft_num) FROM Aircrafts")
     row = cursor.fetchone()
-    current_max = row["max_num"] or 0
-    return int(current_max) + 1
+    return int(row[0] or 0) + 1
 
 
 def _reserve_aircraft_number(cursor, amount: int = 1) -> int:
@@ -153,80 +186,60 @@ def _reserve_aircraft_number(cursor, amount: int = 1) -> int:
         - Aircraft_id = 'AC' + manufacturer_initial + <running 3-digit number>
           e.g. 'ACB001', 'ACA002', 'ACD003', ...
     IdCounters row name: 'Aircraft'
+
+    Expects a plain (tuple) cursor (see _reserve_seat_block).
     """
     if amount <= 0:
         raise ValueError("amount must be positive")
 
     try:
-        cursor.execute(
-            "SELECT NextNum FROM IdCounters WHERE Name = %s FOR UPDATE",
-            ("Aircraft",),
-        )
-        row = cursor.fetchone()
-
-        if row is None:
-            cursor.execute(
-                """
-                SELECT COALESCE(MAX(CAST(SUBSTRING(Aircraft_id, 4) AS UNSIGNED)), 0) AS max_num
-                FROM Aircrafts
-                WHERE UPPER(LEFT(Aircraft_id, 2)) = 'AC'
-                FOR UPDATE
-                """
-            )
-            m = cursor.fetchone()
-            start = int((m or {}).get("max_num", 0) or 0) + 1
-
-            try:
-                cursor.execute(
-                    "INSERT INTO IdCounters (Name, NextNum) VALUES (%s, %s)",
-                    ("Aircraft", start + amount),
-                )
-            except Error as e:
-                if getattr(e, "errno", None) == errorcode.ER_DUP_ENTRY:
-                    cursor.execute(
-                        "SELECT NextNum FROM IdCounters WHERE Name = %s FOR UPDATE",
-                        ("Aircraft",),
-                    )
-                    row2 = cursor.fetchone()
-                    if not row2:
-                        raise
-                    start = int(row2["NextNum"])
-                    cursor.execute(
-                        "UPDATE IdCounters SET NextNum = %s WHERE Name = %s",
-                        (start + amount, "Aircraft"),
-                    )
-                else:
-                    raise
-
-            return start
-
-        start = int(row["NextNum"])
-        cursor.execute(
-            "UPDATE IdCounters SET NextNum = %s WHERE Name = %s",
-            (start + amount, "Aircraft"),
-        )
-        return start
+        # Same single-upsert pattern as _reserve_seat_block.
+        cursor.execute(SQL_RESERVE_AIRCRAFT_COUNTER, ("Aircraft", amount, amount))
+        if cursor.rowcount == 1:
+            cursor.execute(SQL_COUNTER_SEEDED_START, (amount, "Aircraft"))
+        else:
+            cursor.execute(SQL_COUNTER_LAST_ID)
+        return int(cursor.fetchone()[0])
 
     except Error as e:
         if getattr(e, "errno", None) == errorcode.ER_NO_SUCH_TABLE:
-            print(
-                "WARNING: IdCounters table missing; falling back to MAX()+1 (not concurrency-safe)."
+            current_app.logger.warning(
+                "IdCounters table missing; falling back to MAX()+1 (not concurrency-safe)."
             )
             return _get_next_aircraft_number(cursor)
         raise
 
 
+def _insert_seat_grid(cursor, aircraft_id, seat_class, rows, cols, start_num, row_offset):
+    """
+    Insert a rows x cols block of seats with one set-based statement.
+
+    A recursive-CTE Cartesian product generates the grid server-side
+    (MySQL 8+), so no per-seat data crosses the wire. Seat ids run
+    sequentially from start_num ('S' + number, zero-padded to three
+    digits below 1000, like the old f"S{n:03d}" formatting); Row_Num
+    continues from row_offset so Economy rows follow Business rows.
+    """
+    cursor.execute(
+        SQL_INSERT_SEAT_GRID,
+        (rows, cols, start_num, cols, aircraft_id, row_offset, seat_class),
+    )
+
+
+@lru_cache(maxsize=16)
+def _manufacturer_initial(manufacturer: str) -> str:
+    """Return the uppercased first letter of manufacturer ('X' if empty)."""
+    if not manufacturer:
+        return "X"
+    return manufacturer.strip()[0].upper()
+
+
 def _build_aircraft_id(manufacturer: str, numeric_suffix: int) -> str:
     """
     Build Aircraft_id in the format:
         AC + <first letter of manufacturer> + 3-digit number
     """
-    if not manufacturer:
-        initial = "X"
-    else:
-        initial = manufacturer.strip()[0].upper()
-
-    return f"AC{initial}{numeric_suffix:03d}"
+    return f"AC{_manufacturer_initial(manufacturer)}{numeric_suffix:03d}"
 
 
 # -------------------------------------------------------------------
@@ -254,30 +267,23 @@ def manager_aircrafts():
     cursor = None
     try:
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        cursor.execute(
-            """
-            SELECT
-                a.Aircraft_id,
-                a.Manufacturer,
-                a.Model,
-                a.Size,
-                a.Purchase_Date,
-                COUNT(s.Seat_id) AS SeatCount
-            FROM Aircrafts a
-            LEFT JOIN Seats s ON s.Aircraft_id = a.Aircraft_id
-            GROUP BY
-                a.Aircraft_id,
-                a.Manufacturer,
-                a.Model,
-                a.Size,
-                a.Purchase_Date
-            ORDER BY a.Aircraft_id
-            """
-        )
-        aircrafts = cursor.fetchall()
-
+        # Unbuffered cursor: rows stream straight into the template loop
+        # instead of being materialized by fetchall() first.
+        cursor = conn.cursor(dictionary=True, buffered=False)
+
+        # Seat_Count is denormalized on Aircrafts (kept in sync by
+        # manager_aircraft_seats), so no JOIN/GROUP BY over Seats needed.
+        cursor.execute(SQL_LIST_FLEET)
+
+        # Fetch the first row eagerly: a bare cursor is always truthy, so
+        # the template's {% if aircrafts %} empty-state branch would never
+        # render. An empty fleet passes []; otherwise the first row is
+        # chained back in front of the still-streaming cursor.
+        first = cursor.fetchone()
+        aircrafts = chain((first,), cursor) if first is not None else []
+
+        # render_template() runs before the finally block closes the
+        # cursor, so Jinja can iterate it directly (one row in flight).
         return render_template(
             "manager_aircrafts_list.html",
             aircrafts=aircrafts,
@@ -285,7 +291,7 @@ def manager_aircrafts():
         )
 
     except Error as e:
-        print("DB error in manager_aircrafts:", e)
+        current_app.logger.exception("DB error in manager_aircrafts")
         flash("Failed to load aircraft fleet.", "error")
         return render_template(
             "manager_aircrafts_list.html",
@@ -318,8 +324,8 @@ def manager_new_aircraft():
     if not _require_manager():
         return redirect(url_for("auth.login"))
 
-    manufacturers = ["Boeing", "Airbus", "Dasso"]
-    sizes = ["Small", "Large"]
+    manufacturers = MANUFACTURERS
+    sizes = SIZES
 
     if request.method == "GET":
         form_aircraft = {
@@ -346,7 +352,7 @@ def manager_new_aircraft():
         "Size": size or "Small",
     }
 
-    if not manufacturer or not model or size not in sizes:
+    if not manufacturer or not model or size not in VALID_SIZES:
         flash("Please fill all fields and select a valid size.", "error")
         return render_template(
             "manager_aircrafts_form.html",
@@ -356,7 +362,7 @@ def manager_new_aircraft():
             lock_manager_nav=True,
         )
 
-    if manufacturer not in manufacturers:
+    if manufacturer not in VALID_MANUFACTURERS:
         flash("Invalid manufacturer selected.", "error")
         return render_template(
             "manager_aircrafts_form.html",
@@ -370,37 +376,34 @@ def manager_new_aircraft():
     cursor = None
     try:
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        # Plain tuple cursor: this flow only inserts and reads back
+        # single scalars, so per-row dicts would be wasted allocations.
+        cursor = conn.cursor()
 
         # Reserve numeric suffix for Aircraft_id
         num = _reserve_aircraft_number(cursor, 1)
         aircraft_id = _build_aircraft_id(manufacturer, num)
 
-        # Ensure uniqueness (defensive)
-        cursor.execute(
-            "SELECT 1 FROM Aircrafts WHERE Aircraft_id = %s",
-            (aircraft_id,),
-        )
-        if cursor.fetchone():
-            flash("Failed to generate a unique Aircraft ID. Please try again.", "error")
-            conn.rollback()
-            return render_template(
-                "manager_aircrafts_form.html",
-                aircraft=form_aircraft,
-                manufacturers=manufacturers,
-                sizes=sizes,
-                lock_manager_nav=True,
-            )
-
         purchase_date = datetime.now()
 
-        cursor.execute(
-            """
-            INSERT INTO Aircrafts (Aircraft_id, Manufacturer, Model, Size, Purchase_Date)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (aircraft_id, manufacturer, model, size, purchase_date),
-        )
+        # The PK enforces uniqueness — no defensive pre-SELECT needed.
+        try:
+            cursor.execute(
+                SQL_INSERT_AIRCRAFT,
+                (aircraft_id, manufacturer, model, size, purchase_date),
+            )
+        except Error as e:
+            if getattr(e, "errno", None) == errorcode.ER_DUP_ENTRY:
+                flash("Failed to generate a unique Aircraft ID. Please try again.", "error")
+                conn.rollback()
+                return render_template(
+                    "manager_aircrafts_form.html",
+                    aircraft=form_aircraft,
+                    manufacturers=manufacturers,
+                    sizes=sizes,
+                    lock_manager_nav=True,
+                )
+            raise
 
         conn.commit()
 
@@ -409,7 +412,7 @@ def manager_new_aircraft():
         return redirect(url_for("main.manager_aircraft_seats", aircraft_id=aircraft_id))
 
     except Error as e:
-        print("DB error in manager_new_aircraft:", e)
+        current_app.logger.exception("DB error in manager_new_aircraft")
         flash("Failed to create aircraft.", "error")
         return render_template(
             "manager_aircrafts_form.html",
@@ -456,22 +459,12 @@ def manager_aircraft_seats(aircraft_id):
     cursor = None
     try:
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        # prepared=True: statements in this flow repeat across requests,
+        # so the server reuses the cached plan and only parameters travel.
+        cursor = conn.cursor(dictionary=True, prepared=True)
 
         # Load aircraft header
-        cursor.execute(
-            """
-            SELECT
-                Aircraft_id,
-                Manufacturer,
-                Model,
-                Size,
-                Purchase_Date
-            FROM Aircrafts
-            WHERE Aircraft_id = %s
-            """,
-            (aircraft_id,),
-        )
+        cursor.execute(SQL_GET_AIRCRAFT, (aircraft_id,))
         aircraft = cursor.fetchone()
 
         if not aircraft:
@@ -529,48 +522,42 @@ def manager_aircraft_seats(aircraft_id):
                     lock_manager_nav=True,
                 )
 
-            # Remove existing seats (if any), then recreate
-            cursor.execute(
-                "DELETE FROM Seats WHERE Aircraft_id = %s",
-                (aircraft_id,),
-            )
+            # One explicit transaction around delete + regenerate so a crash
+            # mid-way cannot leave a partial layout; READ COMMITTED avoids
+            # gap/next-key locking on the bulk insert. The header SELECT
+            # above already opened an implicit transaction (autocommit is
+            # off) and start_transaction() refuses to nest, so close that
+            # read snapshot first.
+            conn.commit()
+            conn.start_transaction(isolation_level="READ COMMITTED")
+
+            # Plain tuple cursor for the write sequence: the counter
+            # reservation reads single scalars, so no dict rows needed.
+            work = conn.cursor(prepared=True)
+            try:
+                # Remove existing seats (if any), then recreate
+                work.execute(SQL_DELETE_AIRCRAFT_SEATS, (aircraft_id,))
+
+                start_num = _reserve_seat_block(work, total_seats)
 
-            start_num = _reserve_seat_block(cursor, total_seats)
-            next_num = start_num
-
-            # Generate seats: Business first, then Economy
-            current_row = 1
-
-            # Large aircraft: Business rows first
-            if size == "Large":
-                for r in range(1, biz_rows + 1):
-                    for c in range(1, biz_cols + 1):
-                        seat_id = f"S{next_num:03d}"
-                        cursor.execute(
-                            """
-                            INSERT INTO Seats
-                                (Seat_id, Aircraft_id, Row_Num, Col_Num, Seat_Class)
-                            VALUES (%s, %s, %s, %s, %s)
-                            """,
-                            (seat_id, aircraft_id, current_row, c, "Business"),
-                        )
-                        next_num += 1
-                    current_row += 1
-
-            # Economy rows (Small or Large)
-            for r in range(1, eco_rows + 1):
-                for c in range(1, eco_cols + 1):
-                    seat_id = f"S{next_num:03d}"
-                    cursor.execute(
-                        """
-                        INSERT INTO Seats
-                            (Seat_id, Aircraft_id, Row_Num, Col_Num, Seat_Class)
-                        VALUES (%s, %s, %s, %s, %s)
-                        """,
-                        (seat_id, aircraft_id, current_row, c, "Economy"),
+                # Generate seats server-side: Business block first, then
+                # Economy continuing the row numbering and seat-id sequence.
+                if size == "Large":
+                    _insert_seat_grid(
+                        work, aircraft_id, "Business",
+                        biz_rows, biz_cols, start_num, row_offset=0,
                     )
-                    next_num += 1
-                current_row += 1
+
+                _insert_seat_grid(
+                    work, aircraft_id, "Economy",
+                    eco_rows, eco_cols,
+                    start_num + biz_rows * biz_cols, row_offset=biz_rows,
+                )
+
+                # Keep the denormalized fleet-list seat count in sync
+                work.execute(SQL_UPDATE_SEAT_COUNT, (total_seats, aircraft_id))
+            finally:
+                work.close()
 
             conn.commit()
             flash("Seats generated successfully and aircraft was added to the fleet.", "success")
@@ -585,7 +572,9 @@ def manager_aircraft_seats(aircraft_id):
         )
 
     except Error as e:
-        print("DB error in manager_aircraft_seats:", e)
+        current_app.logger.exception("DB error in manager_aircraft_seats")
+        if conn:
+            conn.rollback()
         flash("Failed to configure seats for this aircraft.", "error")
         return redirect(url_for("main.manager_aircrafts"))
     finally:
@@ -18,9 +18,13 @@ Core rule:
 """
 
 from datetime import datetime, timedelta
+from functools import lru_cache
+from time import monotonic
+import json
 import re
 
 from flask import (
+    g,
     render_template,
     request,
     flash,
@@ -39,16 +43,22 @@ from . import main_bp, _require_customer
 # Simple validation helpers
 # -------------------------------------------------------------------
 
-EMAIL_RE = re.compile(r"^[^@]+@[^@]+\.[^@]+$")
+EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
 PHONE_MIN_LEN = 7
 PHONE_MAX_LEN = 15
-NAME_RE = re.compile(r"^[A-Za-z\u0590-\u05FF][A-Za-z\u0590-\u05FF\s\-']*$")
+NAME_RE = re.compile(r"[A-Za-z\u0590-\u05FF][A-Za-z\u0590-\u05FF\s\-']*")
+
+# Single-pass strip of separators (no intermediate string per replace).
+_PHONE_STRIP = str.maketrans("", "", " -")
 
 
 def _normalize_phone_num(phone: str) -> str:
-    return phone.replace(" ", "").replace("-", "")
+    return phone.translate(_PHONE_STRIP)
 
 
+# Cached: the same numbers are validated in book_seats and again when the
+# phone rows are inserted.
+@lru_cache(maxsize=512)
 def _is_valid_phone_num(phone: str) -> bool:
     if not phone:
         return False
@@ -57,20 +67,111 @@ def _is_valid_phone_num(phone: str) -> bool:
 
 
 
+NAME_EN_RE = re.compile(r"[A-Za-z][A-Za-z\s\-']*")
+
+
+def _validate_guest_details(first_name, last_name, email, raw_phones):
+    """
+    Validate guest booking details in one pass.
+
+    Returns (errors, phones_clean) where phones_clean is the normalized,
+    deduplicated phone list. Pure function over its arguments — the field
+    checks all hit the cached validators below.
+    """
+    errors = []
+
+    if not first_name:
+        errors.append("First name is required.")
+    elif not _is_valid_name(first_name, english_only=True):
+        errors.append("First name is invalid. Use 2–50 English letters only (A–Z), spaces, - or '.")
+
+    if not last_name:
+        errors.append("Last name is required.")
+    elif not _is_valid_name(last_name, english_only=True):
+        errors.append("Last name is invalid. Use 2–50 English letters only (A–Z), spaces, - or '.")
+
+    if not email:
+        errors.append("Email is required.")
+    elif len(email) > 254:
+        errors.append("Email address is too long.")
+    elif not EMAIL_RE.fullmatch(email):
+        errors.append("Invalid email address format.")
+
+    phones_seen = {}
+    for idx, p in enumerate(raw_phones, start=1):
+        if not p:
+            continue
+        if not _is_valid_phone_num(p):
+            errors.append(f"Phone {idx} is invalid. Use digits only (7–15; spaces/dashes allowed).")
+        else:
+            phones_seen[_normalize_phone_num(p)] = None
+
+    phones_clean = list(phones_seen)
+    if not phones_clean:
+        errors.append("Please provide at least one phone number.")
 
+    return errors, phones_clean
 
-NAME_EN_RE = re.compile(r"^[A-Za-z][A-Za-z\s\-']*$")
 
+@lru_cache(maxsize=512)
 def _is_valid_name(name: str, english_only: bool = False) -> bool:
     if not name:
         return False
     if not (2 <= len(name) <= 50):
         return False
     if english_only:
-        return bool(NAME_EN_RE.match(name))
-    return bool(NAME_RE.match(name))
+        return bool(NAME_EN_RE.fullmatch(name))
+    return bool(NAME_RE.fullmatch(name))
+
+
+
+# -------------------------------------------------------------------
+# In-process caches for the public flight search
+# -------------------------------------------------------------------
+# Same pattern as a Redis cache (long TTL for reference data, short TTL
+# for volatile search results, invalidation on the write path) but kept
+# per worker — this deployment has no cache server, and even a local
+# cache removes the Airports query plus the full seat-status sync from
+# repeat searches.
+
+AIRPORTS_CACHE_TTL = 86400  # seconds; airports change rarely
+SEARCH_CACHE_TTL = 60       # seconds; availability may lag this much
+
+# Cap on rows returned (and cached) per search; keeps the result set
+# and its cache entry bounded on a mature flight schedule.
+SEARCH_RESULT_LIMIT = 200
+
+# Cap on distinct cached searches per worker. The key comes from the
+# query string, so without a bound (and without rejecting junk keys)
+# arbitrary request values would grow the dict forever.
+SEARCH_CACHE_MAX = 512
+
+_airports_cache = {"expires": 0.0, "rows": [], "codes": frozenset()}
+_search_cache = {}  # (origin, dest, date, date_type) -> (expires, flights)
 
 
+def _invalidate_search_cache():
+    """Drop cached search results after a commit that changes seat state."""
+    _search_cache.clear()
+
+
+def _store_search_cache(key, flights, now):
+    """Cache one search result, sweeping expired entries at the size cap."""
+    if len(_search_cache) >= SEARCH_CACHE_MAX:
+        for k in [k for k, v in _search_cache.items() if v[0] <= now]:
+            _search_cache.pop(k, None)
+        if len(_search_cache) >= SEARCH_CACHE_MAX:
+            _search_cache.clear()
+    _search_cache[key] = (now + SEARCH_CACHE_TTL, flights)
+
+
+# Derived table turning a JSON-array parameter of seat ids into rows, so
+# IN (%s, %s, ...) lists of varying length (one statement shape per cart
+# size) are replaced by a single parameter and a single cached plan.
+SQL_SEAT_IDS_TABLE = (
+    "JSON_TABLE(%s, '$[*]' COLUMNS (FlightSeat_id VARCHAR(10) PATH '$')) j"
+)
+
 
 # -------------------------------------------------------------------
 # Helper: arrival time
@@ -101,30 +202,24 @@ def _sync_seat_status_from_orders(cursor, flight_id=None):
         flight_filter_sql = " AND fs.Flight_id = %s "
         params.append(flight_id)
 
-    # 1) If there is a ticket for an order cancelled-system => Blocked (only if currently Available)
+    # One CASE-based UPDATE instead of two near-identical multi-join ones:
+    # Cancelled-System order  => Blocked
+    # any other live order    => Sold
+    # Cancelled-Customer rows are excluded in the WHERE so the seat stays
+    # Available. Status_Norm is a stored generated column, so no
+    # UPPER(TRIM(...)) runs per row at sync time.
     cursor.execute(
         f"""
         UPDATE FlightSeats fs
         JOIN Tickets t ON t.FlightSeat_id = fs.FlightSeat_id
         JOIN Orders  o ON o.Order_code    = t.Order_code
-        SET fs.Seat_Status = 'Blocked'
+        SET fs.Seat_Status = CASE
+            WHEN o.Status_Norm = 'CANCELLED-SYSTEM' THEN 'Blocked'
+            ELSE 'Sold'
+        END
         WHERE fs.Seat_Status = 'Available'
           {flight_filter_sql}
-          AND UPPER(TRIM(COALESCE(o.Status,''))) = 'CANCELLED-SYSTEM'
-        """,
-        tuple(params),
-    )
-
-    # 2) If there is a ticket for an order that is NOT cancelled-customer and NOT cancelled-system => Sold
-    cursor.execute(
-        f"""
-        UPDATE FlightSeats fs
-        JOIN Tickets t ON t.FlightSeat_id = fs.FlightSeat_id
-        JOIN Orders  o ON o.Order_code    = t.Order_code
-        SET fs.Seat_Status = 'Sold'
-        WHERE fs.Seat_Status = 'Available'
-          {flight_filter_sql}
-          AND UPPER(TRIM(COALESCE(o.Status,''))) NOT IN ('CANCELLED-CUSTOMER','CANCELLED-SYSTEM')
+          AND o.Status_Norm <> 'CANCELLED-CUSTOMER'
         """,
         tuple(params),
     )
@@ -134,37 +229,29 @@ def _sync_seat_status_from_orders(cursor, flight_id=None):
 # Helper: update flight full/active status based on Seat_Status ONLY
 # -------------------------------------------------------------------
 
-def _update_flight_full_status(cursor, flight_id):
-    cursor.execute(
-        "SELECT Status FROM Flights WHERE Flight_id = %s FOR UPDATE",
-        (flight_id,),
-    )
-    row = cursor.fetchone()
-    if not row:
-        return
-
-    current_status = row["Status"]
-    if current_status in ("Cancelled", "Completed"):
+def _update_flights_full_status(cursor, flight_ids):
+    # Available_Seats is a denormalized counter on Flights maintained by
+    # the FlightSeats triggers, so no COUNT scan over the seat map here.
+    # Single conditional UPDATE (no SELECT/fetch round trip): the row
+    # locks are taken by the UPDATE itself, and the final predicate makes
+    # it a no-op for flights whose status is already correct.
+    if not flight_ids:
         return
-
+    placeholders = ",".join(["%s"] * len(flight_ids))
     cursor.execute(
-        """
-        SELECT COUNT(*) AS Available_Seats
-        FROM FlightSeats fs
-        WHERE fs.Flight_id = %s
-          AND fs.Seat_Status = 'Available'
+        f"""
+        UPDATE Flights
+        SET Status = IF(Available_Seats = 0, 'Full-Occupied', 'Active')
+        WHERE Flight_id IN ({placeholders})
+          AND Status NOT IN ('Cancelled', 'Completed')
+          AND Status <> IF(Available_Seats = 0, 'Full-Occupied', 'Active')
         """,
-        (flight_id,),
+        tuple(flight_ids),
     )
-    row = cursor.fetchone() or {}
-    available = int(row.get("Available_Seats") or 0)
 
-    new_status = "Full-Occupied" if available == 0 else "Active"
-    if new_status != current_status:
-        cursor.execute(
-            "UPDATE Flights SET Status = %s WHERE Flight_id = %s",
-            (new_status, flight_id),
-        )
+
+def _update_flight_full_status(cursor, flight_id):
+    _update_flights_full_status(cursor, (flight_id,))
 
 
 # -------------------------------------------------------------------
@@ -173,110 +260,87 @@ def _update_flight_full_status(cursor, flight_id):
 
 def _cleanup_cancelled_orders_seats(cursor):
     """
-    If Orders were manually marked Cancelled-Customer in SQL but seats not released,
-    release only seats that are not re-sold to another non-cancelled-customer order.
+    If Orders were manually marked Cancelled-Customer in SQL but seats not
+    released, release only seats that are not re-sold to another
+    non-cancelled-customer order. Two set-based statements (same logic as
+    the ev_cleanup_cancelled_seats event), not a per-order loop.
     """
     cursor.execute(
         """
-        SELECT DISTINCT o.Order_code, o.Flight_id
-        FROM Orders o
-        JOIN Tickets t      ON o.Order_code     = t.Order_code
-        JOIN FlightSeats fs ON fs.FlightSeat_id = t.FlightSeat_id
-        LEFT JOIN Tickets t2
-               ON t2.FlightSeat_id = fs.FlightSeat_id
-        LEFT JOIN Orders o2
-               ON o2.Order_code = t2.Order_code
-              AND (
-                    o2.Status IS NULL
-                    OR UPPER(TRIM(o2.Status)) <> 'CANCELLED-CUSTOMER'
-                  )
-        WHERE UPPER(TRIM(o.Status)) = 'CANCELLED-CUSTOMER'
-          AND fs.Seat_Status = 'Sold'             -- FIX: only Sold can be released
-          AND o2.Order_code IS NULL
+        UPDATE FlightSeats fs
+        JOIN Tickets t ON t.FlightSeat_id = fs.FlightSeat_id
+        JOIN Orders  o ON o.Order_code    = t.Order_code
+        SET fs.Seat_Status = 'Available'
+        WHERE o.Status_Norm = 'CANCELLED-CUSTOMER'
+          AND fs.Seat_Status = 'Sold'             -- never override Blocked
+          AND NOT EXISTS (
+              SELECT 1
+              FROM Tickets t2
+              JOIN Orders o2 ON o2.Order_code = t2.Order_code
+              WHERE t2.FlightSeat_id = fs.FlightSeat_id
+                AND o2.Status_Norm <> 'CANCELLED-CUSTOMER'
+          )
         """
     )
-    rows = cursor.fetchall() or []
-
-    for row in rows:
-        order_code = row["Order_code"]
-        flight_id = row["Flight_id"]
-
-        cursor.execute(
-            """
-            UPDATE FlightSeats fs
-            JOIN Tickets t ON t.FlightSeat_id = fs.FlightSeat_id
-            SET fs.Seat_Status = 'Available'
-            WHERE t.Order_code = %s
-              AND fs.Seat_Status = 'Sold'         -- FIX: never override Blocked
-            """,
-            (order_code,),
-        )
 
-        _update_flight_full_status(cursor, flight_id)
+    cursor.execute(
+        """
+        UPDATE Flights
+        SET Status = IF(Available_Seats = 0, 'Full-Occupied', 'Active')
+        WHERE Status NOT IN ('Cancelled', 'Completed')
+          AND Status <> IF(Available_Seats = 0, 'Full-Occupied', 'Active')
+        """
+    )
 
 
 # -------------------------------------------------------------------
 # Helper: set seat status for all seats in an order
 # -------------------------------------------------------------------
 
-def _set_seat_status_for_order(cursor, order_code, seat_status):
+def _set_seat_status_for_orders(cursor, order_codes, seat_status):
+    if not order_codes:
+        return
+    placeholders = ",".join(["%s"] * len(order_codes))
     cursor.execute(
-        """
+        f"""
         UPDATE FlightSeats fs
         JOIN Tickets t ON t.FlightSeat_id = fs.FlightSeat_id
         SET fs.Seat_Status = %s
-        WHERE t.Order_code = %s
+        WHERE t.Order_code IN ({placeholders})
         """,
-        (seat_status, order_code),
+        (seat_status, *order_codes),
     )
 
 
-def _reset_cancelled_seats_price_to_current_class_price(cursor, order_code: str):
-    """
-    Update Seat_Price for the seats that belong to this order (the seats being cancelled)
-    to the CURRENT price of the same Flight + Seat_Class.
-    """
+def _set_seat_status_for_order(cursor, order_code, seat_status):
+    _set_seat_status_for_orders(cursor, (order_code,), seat_status)
 
-    cursor.execute(
-        """
-        UPDATE FlightSeats fs_cancel
-        JOIN Tickets t_cancel
-          ON t_cancel.FlightSeat_id = fs_cancel.FlightSeat_id
-         AND t_cancel.Order_code = %s
-        JOIN Seats s_cancel
-          ON s_cancel.Seat_id = fs_cancel.Seat_id
 
-        JOIN (
-            SELECT
-                fs2.Flight_id,
-                s2.Seat_Class,
-                COALESCE(
-                    MIN(CASE
-                            WHEN fs2.Seat_Status IN ('Available','Blocked')
-                            THEN fs2.Seat_Price
-                        END),
-                    MIN(fs2.Seat_Price)
-                ) AS class_price
-            FROM FlightSeats fs2
-            JOIN Seats s2 ON s2.Seat_id = fs2.Seat_id
-
-            -- exclude the seats that belong to THIS cancelled order
-            LEFT JOIN Tickets tx
-              ON tx.FlightSeat_id = fs2.FlightSeat_id
-             AND tx.Order_code    = %s
-
-            WHERE fs2.Seat_Price IS NOT NULL
-              AND tx.FlightSeat_id IS NULL
-
-            GROUP BY fs2.Flight_id, s2.Seat_Class
-            HAVING class_price IS NOT NULL
-        ) p
-          ON p.Flight_id  = fs_cancel.Flight_id
-         AND p.Seat_Class = s_cancel.Seat_Class
-
-        SET fs_cancel.Seat_Price = p.class_price
-        """,
-        (order_code, order_code),
+def _call_cancel_order(cursor, order_code, customer_email):
+    """
+    Run sp_cancel_order and return (outcome, total, fee, refund).
+
+    outcome is 'ok', 'not_found', 'already_cancelled' or 'too_late'.
+    The procedure owns its own transaction (lock, validation, seat price
+    reset to the current class price, seat release, status updates), so
+    there is nothing to commit client-side on success.
+    """
+    out = cursor.callproc(
+        "sp_cancel_order",
+        (
+            order_code,
+            customer_email,
+            ("", "CHAR"),
+            (0, "DECIMAL(10,2)"),
+            (0, "DECIMAL(10,2)"),
+            (0, "DECIMAL(10,2)"),
+        ),
+    )
+    return (
+        out["sp_cancel_order_arg3"],
+        float(out["sp_cancel_order_arg4"] or 0.0),
+        float(out["sp_cancel_order_arg5"] or 0.0),
+        float(out["sp_cancel_order_arg6"] or 0.0),
     )
 
 
@@ -317,37 +381,31 @@ def _auto_complete_order_if_due(cursor, order, time_to_dep: timedelta) -> bool:
 
 def _get_next_order_code(cursor) -> str:
     try:
+        # Atomic upsert (same idiom as the aircraft/seat counters): an
+        # existing row is bumped in one statement with LAST_INSERT_ID(expr)
+        # capturing the allocated number, and a missing row is seeded from
+        # MAX(Order_code) inside the same INSERT. No SELECT ... FOR UPDATE,
+        # so concurrent bookings no longer queue behind the counter row.
         cursor.execute(
-            "SELECT NextNum FROM IdCounters WHERE Name = %s FOR UPDATE",
+            """
+            INSERT INTO IdCounters (Name, NextNum)
+            VALUES (%s, (SELECT COALESCE(
+                        MAX(CAST(SUBSTRING(Order_code, 2) AS UNSIGNED)), 0
+                    ) + 2 FROM Orders))
+            ON DUPLICATE KEY UPDATE NextNum = LAST_INSERT_ID(NextNum) + 1
+            """,
             ("Order",),
         )
-        row = cursor.fetchone()
-
-        if row is None:
+        if cursor.rowcount == 1:
+            # Fresh counter row: a plain insert does not set
+            # LAST_INSERT_ID(), so read the seeded value back.
             cursor.execute(
-                """
-                SELECT COALESCE(
-                    MAX(CAST(SUBSTRING(Order_code, 2) AS UNSIGNED)), 0
-                ) AS max_num
-                FROM Orders
-                FOR UPDATE
-                """
+                "SELECT NextNum - 1 AS num FROM IdCounters WHERE Name = %s",
+                ("Order",),
             )
-            m = cursor.fetchone() or {}
-            current_max = int(m.get("max_num", 0) or 0)
-            next_num = current_max + 1
-
-            cursor.execute(
-                "INSERT INTO IdCounters (Name, NextNum) VALUES (%s, %s)",
-                ("Order", next_num + 1),
-            )
-            return f"O{next_num:09d}"
-
-        next_num = int(row["NextNum"])
-        cursor.execute(
-            "UPDATE IdCounters SET NextNum = %s WHERE Name = %s",
-            (next_num + 1, "Order"),
-        )
+        else:
+            cursor.execute("SELECT LAST_INSERT_ID() AS num")
+        next_num = int(cursor.fetchone()["num"])
         return f"O{next_num:09d}"
 
     except Error as e:
@@ -371,12 +429,54 @@ def _get_next_order_code(cursor) -> str:
 # Helper: customer lookup & guest↔registered logic
 # -------------------------------------------------------------------
 
+def _get_customer_with_phones(cursor, email: str):
+    """
+    Fetch a registered customer's profile and phone list in one round trip:
+    the phones come back aggregated as a JSON array instead of a second
+    query. Returns (customer_row_or_None, sorted_phone_list).
+    """
+    cursor.execute(
+        """
+        SELECT rc.Customer_Email, rc.First_Name, rc.Last_Name,
+               rc.Passport_No, rc.Birth_Date,
+               JSON_ARRAYAGG(rp.Phone_Number) AS Phones
+        FROM Register_Customers rc
+        LEFT JOIN Register_Customers_Phones rp
+               ON rp.Customer_Email = rc.Customer_Email
+        WHERE rc.Customer_Email = %s
+        GROUP BY rc.Customer_Email
+        """,
+        (email,),
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None, []
+    # A customer without phones aggregates to [null]; drop the nulls.
+    phones = sorted(p for p in json.loads(row.pop("Phones") or "[]") if p)
+    return row, phones
+
+
+def _current_customer(cursor):
+    """
+    Request-scoped memo of the signed-in customer's profile and phones.
+
+    First call queries via _get_customer_with_phones and caches the pair
+    on flask.g; any further lookup in the same request is free.
+    """
+    cached = g.get("_customer_ctx")
+    if cached is None:
+        cached = g._customer_ctx = _get_customer_with_phones(
+            cursor, session["customer_email"]
+        )
+    return cached
+
+
 def _get_registered_customer(cursor, email: str):
     cursor.execute(
         """
         SELECT Customer_Email, First_Name, Last_Name, Passport_No, Birth_Date
         FROM Register_Customers
-        WHERE LOWER(Customer_Email) = %s
+        WHERE Customer_Email = %s
         """,
         (email.lower(),),
     )
@@ -388,7 +488,7 @@ def _get_guest_customer(cursor, email: str):
         """
         SELECT Customer_Email, First_Name, Last_Name
         FROM Guest_Customers
-        WHERE LOWER(Customer_Email) = %s
+        WHERE Customer_Email = %s
         """,
         (email.lower(),),
     )
@@ -405,54 +505,30 @@ def _insert_guest_customer(cursor, email: str, first_name: str, last_name: str):
     )
 
 
-def _insert_guest_phones(cursor, email: str, phones):
-    for phone in phones:
-        normalized = _normalize_phone_num(phone)
-        if not normalized:
-            continue
+def _insert_phones_batch(cursor, table: str, email: str, phones):
+    """
+    Insert normalized phones for email into table in one round trip.
 
-        cursor.execute(
-            """
-            SELECT 1
-            FROM Guest_Customers_Phones
-            WHERE LOWER(Customer_Email) = %s
-              AND REPLACE(REPLACE(Phone_Number,'-',''),' ','') = %s
-            """,
-            (email.lower(), normalized),
-        )
-        if not cursor.fetchone():
-            cursor.execute(
-                """
-                INSERT INTO Guest_Customers_Phones (Customer_Email, Phone_Number)
-                VALUES (%s, %s)
-                """,
-                (email, normalized),
-            )
+    Every write path normalizes numbers first, so the stored rows are
+    normalized too and the (Customer_Email, Phone_Number) PK plus
+    INSERT IGNORE make this idempotent — no existence SELECT needed.
+    """
+    normalized = [p for p in (_normalize_phone_num(ph) for ph in phones) if p]
+    if not normalized:
+        return
 
+    cursor.executemany(
+        f"INSERT IGNORE INTO {table} (Customer_Email, Phone_Number) VALUES (%s, %s)",
+        [(email, p) for p in dict.fromkeys(normalized)],
+    )
 
-def _insert_registered_phones_from_list(cursor, email: str, phones):
-    for phone in phones:
-        normalized = _normalize_phone_num(phone)
-        if not normalized:
-            continue
 
-        cursor.execute(
-            """
-            SELECT 1
-            FROM Register_Customers_Phones
-            WHERE LOWER(Customer_Email) = %s
-              AND REPLACE(REPLACE(Phone_Number,'-',''),' ','') = %s
-            """,
-            (email.lower(), normalized),
-        )
-        if not cursor.fetchone():
-            cursor.execute(
-                """
-                INSERT INTO Register_Customers_Phones (Customer_Email, Phone_Number)
-                VALUES (%s, %s)
-                """,
-                (email, normalized),
-            )
+def _insert_guest_phones(cursor, email: str, phones):
+    _insert_phones_batch(cursor, "Guest_Customers_Phones", email, phones)
+
+
+def _insert_registered_phones_from_list(cursor, email: str, phones):
+    _insert_phones_batch(cursor, "Register_Customers_Phones", email, phones)
 
 
 # -------------------------------------------------------------------
@@ -461,90 +537,66 @@ def _insert_registered_phones_from_list(cursor, email: str, phones):
 
 @main_bp.route("/flights/search", methods=["GET"])
 def search_flights():
-    origin = (request.args.get("origin") or "").strip()
-    dest = (request.args.get("dest") or "").strip()
+    # Normalize everything that ends up in the cache key: airport codes
+    # are stored uppercase, and the query ignores unparsable dates, so
+    # fold case variants and date typos into one canonical key instead
+    # of caching an entry per raw spelling.
+    origin = (request.args.get("origin") or "").strip().upper()
+    dest = (request.args.get("dest") or "").strip().upper()
     date_str = (request.args.get("date") or "").strip()
     date_type = (request.args.get("date_type") or "dep").strip().lower()
     if date_type not in ("dep", "arr"):
         date_type = "dep"
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        date_str = ""
 
     today_str = datetime.now().strftime("%Y-%m-%d")
 
+    now = monotonic()
+    airports = _airports_cache["rows"] if _airports_cache["expires"] > now else None
+    cached = _search_cache.get((origin, dest, date_str, date_type))
+    flights = cached[1] if cached is not None and cached[0] > now else None
+
+    if airports is not None and flights is not None:
+        # Full cache hit: no DB connection, no seat-status sync.
+        return render_template(
+            "search_flights.html",
+            airports=airports,
+            flights=flights,
+            search_params={"origin": origin, "dest": dest, "date": date_str, "date_type": date_type},
+            today_str=today_str,
+        )
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    flights = []
-    airports = []
-
     try:
-        _sync_seat_status_from_orders(cursor, flight_id=None)
-        conn.commit()
-
-        cursor.execute("SELECT Airport_code, City FROM Airports ORDER BY City")
-        airports = cursor.fetchall()
-
-        query = """
-            SELECT
-                f.Flight_id,
-                f.Dep_DateTime,
-                DATE_ADD(f.Dep_DateTime, INTERVAL fr.Duration_Minutes MINUTE) AS Arr_DateTime,
-                a.Model AS AircraftModel,
-                fr.Origin_Airport_code,
-                fr.Destination_Airport_code,
-                fr.Duration_Minutes,
-                (
-                    SELECT MIN(fs.Seat_Price)
-                    FROM FlightSeats fs
-                    WHERE fs.Flight_id = f.Flight_id
-                      AND fs.Seat_Status = 'Available'
-                ) AS Min_Price,
-                (
-                    SELECT COUNT(*)
-                    FROM FlightSeats fs
-                    WHERE fs.Flight_id = f.Flight_id
-                      AND fs.Seat_Status = 'Available'
-                ) AS Available_Seats
-            FROM Flights f
-            JOIN Flight_Routes fr ON f.Route_id = fr.Route_id
-            JOIN Aircrafts a      ON f.Aircraft_id = a.Aircraft_id
-            WHERE f.Status IN ('Active','Full-Occupied')
-              AND f.Dep_DateTime > NOW()
-            ORDER BY f.Dep_DateTime
-        """
-        cursor.execute(query)
-        flights_raw = cursor.fetchall()
-
-        for f in flights_raw:
-            available = int(f.get("Available_Seats") or 0)
-            if available <= 0:
-                continue
-
-            dep_dt = f["Dep_DateTime"]
-            arr_dt = f["Arr_DateTime"]
-
-            if date_str:
-                if date_type == "dep":
-                    if dep_dt.strftime("%Y-%m-%d") != date_str:
-                        continue
-                else:
-                    if arr_dt.strftime("%Y-%m-%d") != date_str:
-                        continue
-
-            if origin and f["Origin_Airport_code"] != origin:
-                continue
-            if dest and f["Destination_Airport_code"] != dest:
-                continue
-
-            f["Dep_str"] = dep_dt.strftime("%H:%M")
-            f["Arr_str"] = arr_dt.strftime("%H:%M")
-            if f["Min_Price"] is None:
-                f["Min_Price"] = 0
-
-            flights.append(f)
+        if airports is None:
+            cursor.execute("SELECT Airport_code, City FROM Airports ORDER BY City")
+            airports = cursor.fetchall()
+            _airports_cache["rows"] = airports
+            _airports_cache["codes"] = frozenset(a["Airport_code"] for a in airports)
+            _airports_cache["expires"] = now + AIRPORTS_CACHE_TTL
+
+        if flights is None:
+            # No seat-status sync here: seat state is kept authoritative at
+            # write time (booking/cancel paths + the Orders status trigger),
+            # so the read path stays read-only.
+            flights = _query_search_flights(cursor, origin, dest, date_str, date_type)
+            # Only cache keys built from known airport codes — unknown
+            # values just return empty results and would otherwise mint
+            # one cache entry per junk query string.
+            known = _airports_cache["codes"]
+            if (not origin or origin in known) and (not dest or dest in known):
+                _store_search_cache((origin, dest, date_str, date_type), flights, now)
 
     except Error as e:
         print("DB Error in search_flights:", e)
         flash("Error searching for flights.", "error")
+        airports = airports or []
+        flights = flights or []
 
     finally:
         cursor.close()
@@ -559,6 +611,75 @@ def search_flights():
     )
 
 
+def _query_search_flights(cursor, origin, dest, date_str, date_type):
+    """Run the aggregate search query and return display-ready flight rows."""
+    # One aggregate scan over FlightSeats (grouped once) instead of two
+    # correlated subqueries per flight row; the INNER JOIN doubles as
+    # the Available_Seats > 0 filter since sold-out flights produce no
+    # aggregate row. Search filters are pushed into the WHERE clause so
+    # only matching flights cross the wire.
+    query = """
+        SELECT
+            f.Flight_id,
+            f.Dep_DateTime,
+            f.Arr_DateTime,
+            a.Model AS AircraftModel,
+            fr.Origin_Airport_code,
+            fr.Destination_Airport_code,
+            fr.Duration_Minutes,
+            fs_agg.Min_Price,
+            fs_agg.Available_Seats
+        FROM Flights f
+        JOIN Flight_Routes fr ON f.Route_id = fr.Route_id
+        JOIN Aircrafts a      ON f.Aircraft_id = a.Aircraft_id
+        JOIN (
+            SELECT Flight_id,
+                   MIN(Seat_Price) AS Min_Price,
+                   COUNT(*) AS Available_Seats
+            FROM FlightSeats
+            WHERE Seat_Status = 'Available'
+            GROUP BY Flight_id
+        ) fs_agg ON fs_agg.Flight_id = f.Flight_id
+        WHERE f.Status IN ('Active','Full-Occupied')
+          AND f.Dep_DateTime > NOW()
+    """
+    params = []
+    if origin:
+        query += " AND fr.Origin_Airport_code = %s"
+        params.append(origin)
+    if dest:
+        query += " AND fr.Destination_Airport_code = %s"
+        params.append(dest)
+    if date_str:
+        try:
+            day = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            day = None
+        if day is not None:
+            # Half-open range instead of DATE(col) = %s: sargable on the
+            # Dep_DateTime / stored Arr_DateTime columns.
+            next_day = day + timedelta(days=1)
+            if date_type == "dep":
+                query += " AND f.Dep_DateTime >= %s AND f.Dep_DateTime < %s"
+            else:
+                query += " AND f.Arr_DateTime >= %s AND f.Arr_DateTime < %s"
+            params.extend((day, next_day))
+    query += " ORDER BY f.Dep_DateTime LIMIT %s"
+    params.append(SEARCH_RESULT_LIMIT)
+
+    cursor.execute(query, tuple(params))
+    flights = cursor.fetchall()
+
+    # Only display formatting remains Python-side.
+    for f in flights:
+        f["Dep_str"] = f["Dep_DateTime"].strftime("%H:%M")
+        f["Arr_str"] = f["Arr_DateTime"].strftime("%H:%M")
+        if f["Min_Price"] is None:
+            f["Min_Price"] = 0
+
+    return flights
+
+
 # -------------------------------------------------------------------
 # Route: Seat selection
 # -------------------------------------------------------------------
@@ -566,7 +687,8 @@ def search_flights():
 @main_bp.route("/booking/<flight_id>/seats", methods=["GET"])
 def select_seats(flight_id):
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    # Fixed-shape statements on a hot page: prepare once, rebind after.
+    cursor = conn.cursor(dictionary=True, prepared=True)
 
     flight = None
     available_seats = []
@@ -591,11 +713,6 @@ def select_seats(flight_id):
             flash("Flight not found.", "error")
             return redirect(url_for("main.search_flights"))
 
-        # sync for this flight
-        _sync_seat_status_from_orders(cursor, flight_id=flight_id)
-        _update_flight_full_status(cursor, flight_id)
-        conn.commit()
-
         dep_dt = flight["Dep_DateTime"]
         duration = int(flight["Duration_Minutes"])
         arr_dt = _compute_arrival(dep_dt, duration)
@@ -605,27 +722,7 @@ def select_seats(flight_id):
         flight["Arr_DateTime"] = arr_dt
 
         if session.get("role") == "customer" and session.get("customer_email"):
-            cursor.execute(
-                """
-                SELECT Customer_Email, First_Name, Last_Name, Passport_No, Birth_Date
-                FROM Register_Customers
-                WHERE Customer_Email = %s
-                """,
-                (session["customer_email"],),
-            )
-            customer = cursor.fetchone()
-
-            cursor.execute(
-                """
-                SELECT Phone_Number
-                FROM Register_Customers_Phones
-                WHERE Customer_Email = %s
-                ORDER BY Phone_Number
-                """,
-                (session["customer_email"],),
-            )
-            rows = cursor.fetchall() or []
-            customer_phones = [r["Phone_Number"] for r in rows]
+            customer, customer_phones = _current_customer(cursor)
 
         cursor.execute(
             """
@@ -674,7 +771,7 @@ def book_seats(flight_id):
     is_registered = session.get("role") == "customer" and session.get("customer_email")
 
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor(dictionary=True, prepared=True)
 
     flight = None
     seats_info = []
@@ -700,10 +797,6 @@ def book_seats(flight_id):
             flash("Flight not found.", "error")
             return redirect(url_for("main.search_flights"))
 
-        _sync_seat_status_from_orders(cursor, flight_id=flight_id)
-        _update_flight_full_status(cursor, flight_id)
-        conn.commit()
-
         dep_dt = flight["Dep_DateTime"]
         duration = int(flight["Duration_Minutes"])
         arr_dt = _compute_arrival(dep_dt, duration)
@@ -711,96 +804,47 @@ def book_seats(flight_id):
         flight["Arr_str"] = arr_dt.strftime("%d/%m/%Y %H:%M")
         flight["Arr_DateTime"] = arr_dt
 
-        format_strings = ",".join(["%s"] * len(selected_seat_ids))
+        # Seat ids travel as one JSON-array parameter joined via JSON_TABLE,
+        # so the statement shape is identical for any cart size (one cached
+        # plan instead of one per IN-list length). Status and price/metadata
+        # come back together — one scan instead of the old check-then-fetch
+        # pair over the same rows.
         cursor.execute(
             f"""
-            SELECT fs.FlightSeat_id
-            FROM FlightSeats fs
-            WHERE fs.FlightSeat_id IN ({format_strings})
-              AND fs.Seat_Status <> 'Available'
-            """,
-            tuple(selected_seat_ids),
-        )
-        if cursor.fetchall():
-            flash("Some of the selected seats were just taken. Please choose seats again.", "error")
-            return redirect(url_for("main.select_seats", flight_id=flight_id))
-
-        cursor.execute(
-            f"""
-            SELECT fs.FlightSeat_id, fs.Seat_Price, s.Row_Num, s.Col_Num, s.Seat_Class
-            FROM FlightSeats fs
+            SELECT fs.FlightSeat_id, fs.Seat_Status, fs.Seat_Price,
+                   s.Row_Num, s.Col_Num, s.Seat_Class
+            FROM {SQL_SEAT_IDS_TABLE}
+            JOIN FlightSeats fs ON fs.FlightSeat_id = j.FlightSeat_id
             JOIN Seats s ON fs.Seat_id = s.Seat_id
-            WHERE fs.FlightSeat_id IN ({format_strings})
             ORDER BY s.Seat_Class DESC, s.Row_Num, s.Col_Num
             """,
-            tuple(selected_seat_ids),
+            (json.dumps(selected_seat_ids),),
         )
         seats_info = cursor.fetchall()
+
+        if len(seats_info) != len(selected_seat_ids) or any(
+            s["Seat_Status"] != "Available" for s in seats_info
+        ):
+            flash("Some of the selected seats were just taken. Please choose seats again.", "error")
+            return redirect(url_for("main.select_seats", flight_id=flight_id))
+
         total_price = sum(float(s["Seat_Price"] or 0) for s in seats_info)
 
         if is_registered:
             customer_email = session["customer_email"]
-            cursor.execute(
-                """
-                SELECT Customer_Email, First_Name, Last_Name, Passport_No, Birth_Date
-                FROM Register_Customers
-                WHERE Customer_Email = %s
-                """,
-                (customer_email,),
-            )
-            customer = cursor.fetchone()
-
-            cursor.execute(
-                """
-                SELECT Phone_Number
-                FROM Register_Customers_Phones
-                WHERE Customer_Email = %s
-                ORDER BY Phone_Number
-                """,
-                (customer_email,),
-            )
-            rows = cursor.fetchall() or []
-            customer_phones = [r["Phone_Number"] for r in rows]
+            customer, customer_phones = _current_customer(cursor)
             guest_info = None
 
         else:
-            first_name = (request.form.get("guest_first_name") or "").strip()
-            last_name = (request.form.get("guest_last_name") or "").strip()
-            guest_email = (request.form.get("guest_email") or "").strip()
-            raw_phones = [(p or "").strip() for p in request.form.getlist("guest_phones")]
-
-            errors = []
-            phones_clean = []
-
-            if not first_name:
-                errors.append("First name is required.")
-            elif not _is_valid_name(first_name, english_only=True):  # <-- CHANGED (English only)
-                errors.append("First name is invalid. Use 2–50 English letters only (A–Z), spaces, - or '.")
-
-            if not last_name:
-                errors.append("Last name is required.")
-            elif not _is_valid_name(last_name, english_only=True):   # <-- CHANGED (English only)
-                errors.append("Last name is invalid. Use 2–50 English letters only (A–Z), spaces, - or '.")
-
-            if not guest_email:
-                errors.append("Email is required.")
-            elif len(guest_email) > 254:
-                errors.append("Email address is too long.")
-            elif not EMAIL_RE.match(guest_email):
-                errors.append("Invalid email address format.")
-
-            for idx, p in enumerate(raw_phones, start=1):
-                if not p:
-                    continue
-                if not _is_valid_phone_num(p):
-                    errors.append(f"Phone {idx} is invalid. Use digits only (7–15; spaces/dashes allowed).")
-                else:
-                    normalized = _normalize_phone_num(p)
-                    if normalized not in phones_clean:
-                        phones_clean.append(normalized)
-
-            if not phones_clean:
-                errors.append("Please provide at least one phone number.")
+            f = request.form
+            first_name = (f.get("guest_first_name") or "").strip()
+            last_name = (f.get("guest_last_name") or "").strip()
+            guest_email = (f.get("guest_email") or "").strip().lower()
+            raw_phones = [(p or "").strip() for p in f.getlist("guest_phones")]
+
+            errors, phones_clean = _validate_guest_details(
+                first_name, last_name, guest_email, tuple(raw_phones)
+            )
 
             if errors:
                 for msg in errors:
@@ -868,26 +912,34 @@ def confirm_booking():
     is_registered = pending.get("is_registered", False)
 
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    # prepared=True: every statement in this transaction has a fixed shape
+    # (the seat list binds as one JSON parameter), so the server parses
+    # each once and later bookings ship binary parameters only.
+    cursor = conn.cursor(dictionary=True, prepared=True)
 
     try:
         conn.start_transaction()
 
         _sync_seat_status_from_orders(cursor, flight_id=flight_id)
-        _update_flight_full_status(cursor, flight_id)
-
-        format_strings = ",".join(["%s"] * len(selected_seat_ids))
+        # No flight status refresh here: nothing below reads
+        # Flights.Status, and the single refresh after the seat sale
+        # covers this flight for the whole transaction.
+
+        # Lock the requested seats that are still Available; SKIP LOCKED
+        # means a seat held by a concurrent booking is simply absent from
+        # the result instead of making us wait on its row lock, so
+        # contention surfaces immediately as a short count.
         cursor.execute(
             f"""
             SELECT fs.FlightSeat_id
-            FROM FlightSeats fs
-            WHERE fs.FlightSeat_id IN ({format_strings})
-              AND fs.Seat_Status <> 'Available'
-            FOR UPDATE
+            FROM {SQL_SEAT_IDS_TABLE}
+            JOIN FlightSeats fs ON fs.FlightSeat_id = j.FlightSeat_id
+            WHERE fs.Seat_Status = 'Available'
+            FOR UPDATE SKIP LOCKED
             """,
-            tuple(selected_seat_ids),
+            (json.dumps(selected_seat_ids),),
         )
-        if cursor.fetchall():
+        if len(cursor.fetchall()) != len(selected_seat_ids):
             conn.rollback()
             session.pop("pending_booking", None)
             flash("Some of the selected seats were just taken. Please choose seats again.", "error")
@@ -905,7 +957,7 @@ def confirm_booking():
         if not is_registered:
             first_name = (pending.get("guest_first_name") or "").strip()
             last_name = (pending.get("guest_last_name") or "").strip()
-            guest_email = (pending.get("guest_email") or "").strip()
+            guest_email = (pending.get("guest_email") or "").strip().lower()
             guest_phones = pending.get("guest_phones") or []
 
             if not first_name or not last_name or not guest_email or not guest_phones:
@@ -946,35 +998,37 @@ def confirm_booking():
             (new_order_code, customer_email, flight_id, customer_type),
         )
 
-        for seat_id in selected_seat_ids:
-            cursor.execute(
-                """
-                UPDATE FlightSeats
-                SET Seat_Status = 'Sold'
-                WHERE FlightSeat_id = %s
-                  AND Seat_Status = 'Available'
-                """,
-                (seat_id,),
-            )
-            if cursor.rowcount != 1:
-                raise Exception(f"Seat {seat_id} is no longer available.")
-
-            # NEW: store historical paid price on ticket
-            cursor.execute(
-                "SELECT Seat_Price FROM FlightSeats WHERE FlightSeat_id = %s",
-                (seat_id,),
-            )
-            price_row = cursor.fetchone() or {}
-            paid_price = float(price_row.get("Seat_Price") or 0.0)
+        # Set-oriented instead of a 3-statements-per-seat loop: one UPDATE
+        # over the whole (already locked) seat list, then one
+        # INSERT ... SELECT that snapshots each seat's current price as
+        # the ticket's historical Paid_Price -- the prices never cross
+        # the wire.
+        cursor.execute(
+            f"""
+            UPDATE FlightSeats fs
+            JOIN {SQL_SEAT_IDS_TABLE} ON j.FlightSeat_id = fs.FlightSeat_id
+            SET fs.Seat_Status = 'Sold'
+            WHERE fs.Seat_Status = 'Available'
+            """,
+            (json.dumps(selected_seat_ids),),
+        )
+        if cursor.rowcount != len(selected_seat_ids):
+            raise Exception("Some selected seats are no longer available.")
 
-            cursor.execute(
-                "INSERT INTO Tickets (FlightSeat_id, Order_code, Paid_Price) VALUES (%s, %s, %s)",
-                (seat_id, new_order_code, paid_price),
-            )
+        cursor.execute(
+            f"""
+            INSERT INTO Tickets (FlightSeat_id, Order_code, Paid_Price)
+            SELECT fs.FlightSeat_id, %s, COALESCE(fs.Seat_Price, 0)
+            FROM {SQL_SEAT_IDS_TABLE}
+            JOIN FlightSeats fs ON fs.FlightSeat_id = j.FlightSeat_id
+            """,
+            (new_order_code, json.dumps(selected_seat_ids)),
+        )
 
         _update_flight_full_status(cursor, flight_id)
 
         conn.commit()
+        _invalidate_search_cache()
         session.pop("pending_booking", None)
         flash("Booking completed successfully.", "success")
         return redirect(url_for("main.booking_confirmation", order_code=new_order_code, just_confirmed="1"))
@@ -1006,36 +1060,14 @@ def booking_confirmation(order_code):
     customer_phones = []
 
     try:
-        cursor.execute(
-            """
-            SELECT
-                o.Order_code,
-                o.Order_Date,
-                o.Status AS Order_Status,
-                o.Customer_Email,
-                o.Customer_Type,
-                rc.First_Name  AS Reg_First_Name,
-                rc.Last_Name   AS Reg_Last_Name,
-                gc.First_Name  AS Guest_First_Name,
-                gc.Last_Name   AS Guest_Last_Name,
-                o.Flight_id,
-                f.Dep_DateTime,
-                f.Status AS Flight_Status,
-                fr.Duration_Minutes,
-                fr.Origin_Airport_code,
-                fr.Destination_Airport_code,
-                a.Model AS AircraftModel
-            FROM Orders o
-            LEFT JOIN Flights       f  ON o.Flight_id = f.Flight_id
-            LEFT JOIN Flight_Routes fr ON f.Route_id  = fr.Route_id
-            LEFT JOIN Aircrafts     a  ON f.Aircraft_id = a.Aircraft_id
-            LEFT JOIN Register_Customers rc ON rc.Customer_Email = o.Customer_Email
-            LEFT JOIN Guest_Customers gc     ON gc.Customer_Email = o.Customer_Email
-            WHERE o.Order_code = %s
-            """,
-            (order_code,),
-        )
-        order = cursor.fetchone()
+        # All three confirmation reads (order row, customer phones,
+        # tickets) come back from one stored-procedure call as separate
+        # result sets, instead of three sequential SELECT round trips.
+        cursor.callproc("sp_booking_confirmation", (order_code,))
+        order_rs, phones_rs, tickets_rs = cursor.stored_results()
+        order = order_rs.fetchone()
+        customer_phones = [r["Phone_Number"] for r in phones_rs.fetchall()]
+        tickets = tickets_rs.fetchall()
         if not order:
             flash("Order not found.", "error")
             return redirect(url_for("main.search_flights"))
@@ -1050,26 +1082,21 @@ def booking_confirmation(order_code):
             order["First_Name"] = None
             order["Last_Name"] = None
 
-        dep_dt = order["Dep_DateTime"]
-        duration = int(order["Duration_Minutes"] or 0)
+        # Display strings and the departure delta arrive pre-computed
+        # from the procedure (arrival via the stored Arr_DateTime column).
+        order["Dep_str"] = order["Dep_str"] or "-"
+        order["Arr_str"] = order["Arr_str"] or "-"
 
-        if dep_dt:
-            arr_dt = _compute_arrival(dep_dt, duration)
-            order["Dep_str"] = dep_dt.strftime("%d/%m/%Y %H:%M")
-            order["Arr_str"] = arr_dt.strftime("%d/%m/%Y %H:%M")
-        else:
-            order["Dep_str"] = "-"
-            order["Arr_str"] = "-"
-
-        order["OrderDate_str"] = order["Order_Date"].strftime("%d/%m/%Y %H:%M")
-
-        if dep_dt:
-            time_to_dep_for_completion = dep_dt - datetime.now()
+        secs = order.pop("Seconds_To_Dep", None)
+        if secs is not None:
+            time_to_dep_for_completion = timedelta(seconds=secs)
         else:
             time_to_dep_for_completion = timedelta(days=99999)
 
-        if _auto_complete_order_if_due(cursor, order, time_to_dep_for_completion):
-            conn.commit()
+        # Both conditional write branches share one commit below, so a
+        # page load fsyncs at most once (and not at all when read-only).
+        wrote = _auto_complete_order_if_due(cursor, order, time_to_dep_for_completion)
+        cancelled_by_system = False
 
         if order["Order_Status"] == "Active" and order.get("Flight_Status") == "Cancelled":
             cursor.execute(
@@ -1085,49 +1112,15 @@ def booking_confirmation(order_code):
             order["Order_Status"] = "Cancelled-System"
             _set_seat_status_for_order(cursor, order_code, "Blocked")
             _update_flight_full_status(cursor, order["Flight_id"])
-            conn.commit()
-
-        email = order.get("Customer_Email")
-        if email:
-            if order.get("Customer_Type") == "Register":
-                cursor.execute(
-                    """
-                    SELECT Phone_Number
-                    FROM Register_Customers_Phones
-                    WHERE LOWER(Customer_Email) = %s
-                    ORDER BY Phone_Number
-                    """,
-                    (email.lower(),),
-                )
-                customer_phones = [r["Phone_Number"] for r in (cursor.fetchall() or [])]
-            else:
-                cursor.execute(
-                    """
-                    SELECT Phone_Number
-                    FROM Guest_Customers_Phones
-                    WHERE LOWER(Customer_Email) = %s
-                    ORDER BY Phone_Number
-                    """,
-                    (email.lower(),),
-                )
-                customer_phones = [r["Phone_Number"] for r in (cursor.fetchall() or [])]
+            wrote = cancelled_by_system = True
 
-        cursor.execute(
-            """
-            SELECT t.FlightSeat_id,
-                   t.Paid_Price AS Seat_Price,
-                   s.Row_Num, s.Col_Num, s.Seat_Class
-            FROM Tickets t
-            JOIN FlightSeats fs ON fs.FlightSeat_id = t.FlightSeat_id
-            JOIN Seats       s  ON s.Seat_id        = fs.Seat_id
-            WHERE t.Order_code = %s
-            ORDER BY s.Seat_Class DESC, s.Row_Num, s.Col_Num
-            """,
-            (order_code,),
-        )
-        tickets = cursor.fetchall()
+        if wrote:
+            conn.commit()
+            if cancelled_by_system:
+                _invalidate_search_cache()
 
-        raw_total = sum(float(t["Seat_Price"] or 0) for t in tickets)
+        # Summed server-side by the window function in the tickets result.
+        raw_total = float(tickets[0]["Order_Total"] or 0) if tickets else 0.0
         order["Original_Total"] = raw_total
 
         status = order["Order_Status"]
@@ -1137,22 +1130,18 @@ def booking_confirmation(order_code):
         if status == "Cancelled-System":
             total_price = 0.0
         elif status == "Cancelled-Customer":
-            fee = round(raw_total * 0.05, 2)
-            refund = max(raw_total - fee, 0.0)
+            # Pre-rounded in DECIMAL by the tickets result set; no float
+            # round() pass here.
+            fee = float(tickets[0]["Cancel_Fee"]) if tickets else 0.0
+            refund = float(tickets[0]["Cancel_Refund"]) if tickets else 0.0
             order["Cancellation_Fee"] = fee
             order["Refund_Amount"] = refund
             total_price = fee
         else:
             total_price = raw_total
 
-        now = datetime.now()
-        if dep_dt:
-            time_to_dep = dep_dt - now
-        else:
-            time_to_dep = timedelta(days=99999)
-
         order["can_cancel_as_guest"] = (
-            time_to_dep > timedelta(hours=36)
+            time_to_dep_for_completion > timedelta(hours=36)
             and order["Order_Status"] not in ("Cancelled-Customer", "Cancelled-System")
         )
 
@@ -1192,20 +1181,68 @@ def customer_orders():
         status_filter = "all"
 
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    # buffered=False: rows stream off the wire into the processing loop
+    # below instead of being materialized twice (driver buffer + list).
+    cursor = conn.cursor(dictionary=True, buffered=False)
     orders = []
 
     try:
-        _cleanup_cancelled_orders_seats(cursor)
-        conn.commit()
+        # Seat release for SQL-edited Cancelled-Customer orders moved to
+        # the ev_cleanup_cancelled_seats MySQL event, off this read path.
+        # Status sweeps as set-based UPDATEs before the page SELECT, so
+        # the render loop below is read-only. Seats of orders about to be
+        # system-cancelled are blocked first (the order filter still sees
+        # Status = 'Active' at that point).
+        cursor.execute(
+            """
+            UPDATE FlightSeats fs
+            JOIN Tickets t ON t.FlightSeat_id = fs.FlightSeat_id
+            JOIN Orders  o ON o.Order_code    = t.Order_code
+            JOIN Flights f ON f.Flight_id     = o.Flight_id
+            SET fs.Seat_Status = 'Blocked'
+            WHERE o.Customer_Email = %s
+              AND o.Status = 'Active'
+              AND f.Status = 'Cancelled'
+            """,
+            (session["customer_email"],),
+        )
+        swept = cursor.rowcount > 0
+        cursor.execute(
+            """
+            UPDATE Orders o
+            JOIN Flights f ON o.Flight_id = f.Flight_id
+            SET o.Status = 'Cancelled-System',
+                o.Cancel_Date = NOW()
+            WHERE o.Customer_Email = %s
+              AND o.Status = 'Active'
+              AND f.Status = 'Cancelled'
+            """,
+            (session["customer_email"],),
+        )
+        swept = swept or cursor.rowcount > 0
+        cursor.execute(
+            """
+            UPDATE Orders o
+            JOIN Flights f ON o.Flight_id = f.Flight_id
+            SET o.Status = 'Completed'
+            WHERE o.Customer_Email = %s
+              AND o.Status = 'Active'
+              AND f.Status <> 'Cancelled'
+              AND f.Dep_DateTime <= NOW() + INTERVAL 36 HOUR
+            """,
+            (session["customer_email"],),
+        )
+        if swept or cursor.rowcount > 0:
+            conn.commit()
 
         base_query = """
             SELECT
                 o.Order_code,
-                o.Order_Date,
                 o.Status               AS Order_Status,
                 o.Flight_id,
-                f.Dep_DateTime,
+                DATE_FORMAT(o.Order_Date, '%%d/%%m/%%Y')       AS Date_str,
+                DATE_FORMAT(f.Dep_DateTime, '%%d/%%m %%H:%%i') AS Dep_str,
+                TIMESTAMPDIFF(SECOND, NOW(), f.Dep_DateTime)   AS Seconds_To_Dep,
                 f.Status               AS Flight_Status,
                 fr.Origin_Airport_code,
                 fr.Destination_Airport_code,
@@ -1227,20 +1264,14 @@ def customer_orders():
         base_query += " GROUP BY o.Order_code ORDER BY o.Order_Date DESC"
 
         cursor.execute(base_query, tuple(params))
-        orders = cursor.fetchall()
 
-        now = datetime.now()
-        to_complete = []
-        to_cancel_sys = []
-        cancel_sys_flights = {}
-
-        for o in orders:
-            o["Date_str"] = o["Order_Date"].strftime("%d/%m/%Y")
-
-            dep_dt = o["Dep_DateTime"]
-            if dep_dt:
-                o["Dep_str"] = dep_dt.strftime("%d/%m %H:%M")
-                time_to_dep = dep_dt - now
+        for o in cursor:
+            # Dates arrive pre-formatted and the departure delta as a
+            # plain integer, so no datetime objects are built per row.
+            # Statuses were already corrected by the sweeps above.
+            secs = o.pop("Seconds_To_Dep", None)
+            if secs is not None:
+                time_to_dep = timedelta(seconds=secs)
             else:
                 o["Dep_str"] = "-"
                 time_to_dep = timedelta(days=99999)
@@ -1248,20 +1279,10 @@ def customer_orders():
             base_total = float(o["Total_Price"] or 0.0)
             o["Ticket_Count"] = int(o["Ticket_Count"] or 0)
 
-            if o["Order_Status"] == "Active":
-                if o.get("Flight_Status") == "Cancelled":
-                    to_cancel_sys.append(o["Order_code"])
-                    cancel_sys_flights[o["Order_code"]] = o["Flight_id"]
-                    o["Order_Status"] = "Cancelled-System"
-                    o["can_cancel"] = False
-                else:
-                    if _auto_complete_order_if_due(cursor, o, time_to_dep):
-                        to_complete.append(o["Order_code"])
-                        o["can_cancel"] = False
-                    else:
-                        o["can_cancel"] = time_to_dep > timedelta(hours=36)
-            else:
-                o["can_cancel"] = False
+            o["can_cancel"] = (
+                o["Order_Status"] == "Active"
+                and time_to_dep > timedelta(hours=36)
+            )
 
             if o["Order_Status"] == "Cancelled-Customer":
                 fee = round(base_total * 0.05, 2)
@@ -1271,37 +1292,7 @@ def customer_orders():
             else:
                 o["Total_Price"] = base_total
 
-        if to_complete:
-            cursor.executemany(
-                """
-                UPDATE Orders
-                SET Status = 'Completed'
-                WHERE Order_code = %s
-                  AND Status = 'Active'
-                """,
-                [(oc,) for oc in to_complete],
-            )
-
-        if to_cancel_sys:
-            cursor.executemany(
-                """
-                UPDATE Orders
-                SET Status = 'Cancelled-System',
-                    Cancel_Date = NOW()
-                WHERE Order_code = %s
-                  AND Status = 'Active'
-                """,
-                [(oc,) for oc in to_cancel_sys],
-            )
-
-            for oc in to_cancel_sys:
-                _set_seat_status_for_order(cursor, oc, "Blocked")
-                flight_id = cancel_sys_flights.get(oc)
-                if flight_id:
-                    _update_flight_full_status(cursor, flight_id)
-
-        if to_complete or to_cancel_sys:
-            conn.commit()
+            orders.append(o)
 
     except Error as e:
         print("DB error in customer_orders:", e)
@@ -1326,77 +1317,26 @@ def cancel_order(order_code):
     cursor = conn.cursor(dictionary=True)
 
     try:
-        conn.start_transaction()
-
-        cursor.execute(
-            """
-            SELECT o.Order_code, o.Status AS Order_Status, o.Customer_Email,
-                   f.Flight_id, f.Dep_DateTime
-            FROM Orders o
-            JOIN Flights f ON o.Flight_id = f.Flight_id
-            WHERE o.Order_code = %s
-              AND o.Customer_Email = %s
-            FOR UPDATE
-            """,
-            (order_code, session["customer_email"]),
+        # The whole cancel sequence (lock, validation, totals, price
+        # reset, seat release, status updates) runs server-side in
+        # sp_cancel_order, so the Orders row lock is held for local
+        # statement time instead of several client round trips.
+        outcome, total_amount, fee, refund = _call_cancel_order(
+            cursor, order_code, session["customer_email"]
         )
-        order = cursor.fetchone()
-        if not order:
-            flash("Order not found or does not belong to you.", "error")
-            conn.rollback()
-            return redirect(url_for("main.customer_orders"))
 
-        if order["Order_Status"] in ("Cancelled-Customer", "Cancelled-System"):
+        if outcome == "not_found":
+            flash("Order not found or does not belong to you.", "error")
+        elif outcome == "already_cancelled":
             flash("This order is already cancelled.", "info")
-            conn.rollback()
-            return redirect(url_for("main.customer_orders"))
-
-        now = datetime.now()
-        time_to_dep = order["Dep_DateTime"] - now
-        if time_to_dep <= timedelta(hours=36):
+        elif outcome == "too_late":
             flash("Order can be cancelled only up to 36 hours before departure.", "error")
-            conn.rollback()
-            return redirect(url_for("main.customer_orders"))
-
-        # Total before any price reset (keeps historical purchase amounts intact)
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(t.Paid_Price), 0) AS Total_Price
-            FROM Tickets t
-            JOIN FlightSeats fs ON t.FlightSeat_id = fs.FlightSeat_id
-            WHERE t.Order_code = %s
-            """,
-            (order_code,),
-        )
-        amount_row = cursor.fetchone() or {"Total_Price": 0}
-        total_amount = float(amount_row["Total_Price"] or 0.0)
-        fee = round(total_amount * 0.05, 2)
-        refund = max(total_amount - fee, 0.0)
-
-        # ===== NEW: reset cancelled seats price to current class price (only if there are Available seats now) =====
-        _reset_cancelled_seats_price_to_current_class_price(cursor, order_code)
-
-        # Release seats
-        _set_seat_status_for_order(cursor, order_code, "Available")
-
-        # Mark order cancelled
-        cursor.execute(
-            """
-            UPDATE Orders
-            SET Status = 'Cancelled-Customer',
-                Cancel_Date = NOW()
-            WHERE Order_code = %s
-            """,
-            (order_code,),
-        )
-
-        _update_flight_full_status(cursor, order["Flight_id"])
-
-        conn.commit()
-        flash(
-            f"Order cancelled successfully. Total was ${total_amount:.2f}. Fee (5%): ${fee:.2f}. Refund: ${refund:.2f}.",
-            "success",
-        )
+        else:
+            _invalidate_search_cache()
+            flash(
+                f"Order cancelled successfully. Total was ${total_amount:.2f}. Fee (5%): ${fee:.2f}. Refund: ${refund:.2f}.",
+                "success",
+            )
         return redirect(url_for("main.customer_orders"))
 
     except Error as e:
@@ -1422,7 +1362,9 @@ def guest_order_lookup():
         errors = []
         if not email:
             errors.append("Email is required.")
-        elif not EMAIL_RE.match(email):
+        elif len(email) > 254:
+            errors.append("Email address is too long.")
+        elif "@" not in email or not EMAIL_RE.fullmatch(email):
             errors.append("Invalid email address format.")
         if not order_code:
             errors.append("Order ID is required.")
@@ -1433,7 +1375,8 @@ def guest_order_lookup():
             return render_template("guest_order_lookup.html")
 
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        # prepared=True: single fixed-shape point lookup on a hot form.
+        cursor = conn.cursor(dictionary=True, prepared=True)
         try:
             # allow lookup for BOTH Guest and Register orders
             cursor.execute(
@@ -1484,76 +1427,24 @@ def guest_cancel_order(order_code):
     cursor = conn.cursor(dictionary=True)
 
     try:
-        conn.start_transaction()
-
-        cursor.execute(
-            """
-            SELECT o.Order_code, o.Status AS Order_Status, o.Customer_Email, o.Customer_Type,
-                   f.Flight_id, f.Dep_DateTime
-            FROM Orders o
-            JOIN Flights f ON o.Flight_id = f.Flight_id
-            WHERE o.Order_code = %s
-              AND o.Customer_Email = %s
-            FOR UPDATE
-            """,
-            (order_code, guest_email),
+        # Same server-side cancel transaction as cancel_order.
+        outcome, total_amount, fee, refund = _call_cancel_order(
+            cursor, order_code, guest_email
         )
-        order = cursor.fetchone()
-        if not order:
+
+        if outcome == "not_found":
             flash("Order not found or does not belong to this email.", "error")
-            conn.rollback()
             return redirect(url_for("main.guest_order_lookup"))
-
-        if order["Order_Status"] in ("Cancelled-Customer", "Cancelled-System"):
+        if outcome == "already_cancelled":
             flash("This order is already cancelled.", "info")
-            conn.rollback()
-            return redirect(url_for("main.booking_confirmation", order_code=order_code))
-
-        now = datetime.now()
-        time_to_dep = order["Dep_DateTime"] - now
-        if time_to_dep <= timedelta(hours=36):
+        elif outcome == "too_late":
             flash("Order can be cancelled only up to 36 hours before departure.", "error")
-            conn.rollback()
-            return redirect(url_for("main.booking_confirmation", order_code=order_code))
-
-        # Total before any price reset (keeps historical purchase amounts intact)
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(t.Paid_Price), 0) AS Total_Price
-            FROM Tickets t
-            JOIN FlightSeats fs ON t.FlightSeat_id = fs.FlightSeat_id
-            WHERE t.Order_code = %s
-            """,
-            (order_code,),
-        )
-        amount_row = cursor.fetchone() or {"Total_Price": 0}
-        total_amount = float(amount_row["Total_Price"] or 0.0)
-        fee = round(total_amount * 0.05, 2)
-        refund = max(total_amount - fee, 0.0)
-
-        _reset_cancelled_seats_price_to_current_class_price(cursor, order_code)
-
-        # Release seats
-        _set_seat_status_for_order(cursor, order_code, "Available")
-
-        # Mark order cancelled
-        cursor.execute(
-            """
-            UPDATE Orders
-            SET Status = 'Cancelled-Customer',
-                Cancel_Date = NOW()
-            WHERE Order_code = %s
-            """,
-            (order_code,),
-        )
-
-        _update_flight_full_status(cursor, order["Flight_id"])
-
-        conn.commit()
-        flash(
-            f"Order cancelled successfully. Total was ${total_amount:.2f}. Fee (5%): ${fee:.2f}. Refund: ${refund:.2f}.",
-            "success",
-        )
+        else:
+            _invalidate_search_cache()
+            flash(
+                f"Order cancelled successfully. Total was ${total_amount:.2f}. Fee (5%): ${fee:.2f}. Refund: ${refund:.2f}.",
+                "success",
+            )
         return redirect(url_for("main.booking_confirmation", order_code=order_code))
 
     except Error as e:
@@ -1614,13 +1614,16 @@ def manager_new_flight():
         status = "Active"
         flight_id = _get_next_flight_id(cursor)
 
+        # Duration_Minutes is denormalized onto Flights so the stored
+        # Arr_DateTime generated column (and the search's arrival filter)
+        # need no join back to Flight_Routes.
         cursor.execute(
             """
             INSERT INTO Flights
-                (Flight_id, Dep_DateTime, Status, Aircraft_id, Route_id)
-            VALUES (%s, %s, %s, %s, %s)
+                (Flight_id, Dep_DateTime, Status, Aircraft_id, Route_id, Duration_Minutes)
+            VALUES (%s, %s, %s, %s, %s, %s)
             """,
-            (flight_id, dep_dt, status, aircraft_id, route_id),
+            (flight_id, dep_dt, status, aircraft_id, route_id, duration_minutes),
         )
 
         # Seats of the selected aircraft